@@ -1,4 +1,5 @@
-from pydantic import BaseSettings
+from functools import lru_cache
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import Optional
 import os
 
@@ -12,6 +13,8 @@ class Settings(BaseSettings):
     # Slack Integration
     slack_bot_token: Optional[str] = None
     slack_signing_secret: Optional[str] = None
+    thread_pool_size: int = 32
+    slack_queue_size: int = 1000
     
     # WhatsApp/Twilio Integration
     twilio_account_sid: Optional[str] = None
@@ -20,20 +23,71 @@ class Settings(BaseSettings):
     
     # Database
     database_url: str = "sqlite:///./chatbot.db"
+    redis_url: Optional[str] = None  # e.g. redis://localhost:6379/0
+    conversation_ttl: int = 86400
+    rag_history_window: int = 5  # Past messages sent to the LLM with each question
+    smalltalk_reply: str = "Hello! Ask me anything about the uploaded documents."
+    exact_cache_ttl: int = 3600  # Exact-match answer cache, used when REDIS_URL is set
     
     # Application Settings
     vector_db_type: str = "faiss"  # Options: pinecone, faiss, chromadb
+    faiss_index_type: str = "flat"  # Options: flat, ivfpq, hnsw
+    faiss_hnsw_m: int = 32  # HNSW links per node
+    faiss_ef_construction: int = 200
+    faiss_ef_search: int = 64
+    faiss_quantization: Optional[str] = None  # Options: fp16, int8
+    faiss_use_gpu: bool = False  # Requires faiss-gpu
     embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+    embedding_backend: str = "torch"  # Options: torch, onnx-int8
     llm_model: str = "gpt-3.5-turbo"
     max_context_length: int = 4000
     top_k_results: int = 3
+    embedding_cache_path: Optional[str] = "embedding_cache.sqlite"
+    query_cache_size: int = 1024
+    search_batch_window_ms: float = 5.0  # 0 disables query micro-batching
+    embed_batch_window_ms: float = 5.0  # 0 disables query embedding micro-batching
+    embed_batch_size: int = 32
+    semantic_cache_threshold: float = 0.95
+    semantic_cache_ttl: float = 300.0
+    semantic_cache_path: Optional[str] = "semantic_cache.bin"  # Saved on web app shutdown
     
     # Server Settings
     host: str = "0.0.0.0"
     port: int = 8000
+    workers: int = 1  # More than one needs shared state, see server_workers()
+    max_concurrent_ingests: int = 2
+    rag_threads: Optional[int] = None  # Threads for blocking RAG calls; defaults to the CPU count
+    stats_cache_ttl: float = 5.0
+    introspection_rate_limit: str = "30/minute"  # /stats and /conversations, per client
+    max_chat_batch: int = 32  # Requests accepted by one /chat/batch call
+    chat_batch_rate_limit: str = "10/minute"  # /chat/batch, per client
+    max_upload_bytes: int = 50 * 1024 * 1024
     
-    class Config:
-        env_file = ".env"
+    model_config = SettingsConfigDict(env_file=".env", frozen=True)
+    
+    @property
+    def shared_state(self) -> bool:
+        """True when server processes can share state: Pinecone vectors and Redis conversations.
+        
+        FAISS and ChromaDB stores are local files that each process would
+        open, cache and overwrite on its own.
+        """
+        return self.vector_db_type.lower() == "pinecone" and bool(self.redis_url)
+    
+    def server_workers(self) -> int:
+        """Return the number of web server processes, refusing more than one without shared state."""
+        if self.workers > 1 and not self.shared_state:
+            raise ValueError(
+                f"WORKERS={self.workers} requires VECTOR_DB_TYPE=pinecone and REDIS_URL; "
+                "a local vector store and in-process conversation history cannot be shared between processes"
+            )
+        return max(self.workers, 1)
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the process-wide settings, parsing the environment only once."""
+    return Settings()
 
 
-settings = Settings()
+settings = get_settings()
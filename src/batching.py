@@ -0,0 +1,66 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional
+
+
+class MicroBatcher:
+    """Coalesce concurrent calls into a single batched call.
+    
+    Callers block in ``submit`` while a worker thread collects items for up
+    to ``window_ms`` (or until ``max_batch_size`` items are queued) and runs
+    ``batch_fn`` once on all of them. ``batch_fn`` must return one result
+    per item, in order. Callers give up after ``timeout`` seconds.
+    """
+    
+    def __init__(self, batch_fn: Callable[[List[Any]], List[Any]], window_ms: float = 5.0,
+                 max_batch_size: int = 64, timeout: Optional[float] = 60.0):
+        self.batch_fn = batch_fn
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.timeout = timeout
+        self._queue = queue.Queue()
+        
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+    
+    def submit(self, item: Any) -> Any:
+        """Queue an item and wait for its result.
+        
+        Raises ``concurrent.futures.TimeoutError`` if no result arrives in time.
+        """
+        future = Future()
+        self._queue.put((item, future))
+        return future.result(timeout=self.timeout)
+    
+    def _run(self):
+        """Collect items until the window closes, then process them together."""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            
+            # Every future must be resolved, or its caller waits until it times out;
+            # BaseException is caught too so the worker thread never dies
+            try:
+                results = list(self.batch_fn([item for item, _ in batch]))
+                if len(results) != len(batch):
+                    raise RuntimeError(
+                        f"batch_fn returned {len(results)} results for {len(batch)} items"
+                    )
+            except BaseException as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
@@ -1,102 +1,321 @@
 import os
+import re
 import json
-from typing import List, Dict, Any, Optional
+import mmap
+import asyncio
+import threading
+import multiprocessing
+from typing import List, Dict, Any, Optional, Set, Iterator, Tuple
 from pathlib import Path
-import PyPDF2
-from docx import Document as DocxDocument
-from bs4 import BeautifulSoup
-import requests
+import numpy as np
+import httpx
 from sentence_transformers import SentenceTransformer
 import tiktoken
 
+from .embedding_cache import EmbeddingCache
+from .onnx_embedder import OnnxEmbeddingModel
+from . import text_extraction
+
+# Separators for iter_chunks: paragraphs, then sentences, then words
+_PARAGRAPH_BREAK = re.compile(rb'\n[ \t\r]*\n')
+_SUBSPLITS = (re.compile(r'(?<=[.!?])\s+'), re.compile(r'\s+'))
+
+# Keep-alive pool shared by URL fetches so repeated hosts reuse connections
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=32)
+_client = httpx.Client(http2=True, limits=_HTTP_LIMITS, timeout=30, follow_redirects=True)
+
+
+def load_embedding_model(model_name: str, backend: str = "torch"):
+    """Load an embedding model for the given backend ("torch" or "onnx-int8")."""
+    if backend == "onnx-int8":
+        return OnnxEmbeddingModel(model_name)
+    elif backend == "torch":
+        model = SentenceTransformer(model_name)
+        if model.device.type == "cuda":
+            # Half precision halves activation bandwidth on GPU
+            model.half()
+        return model
+    else:
+        raise ValueError(f"Unsupported embedding backend: {backend}")
+
+
+# Loaded models, shared by every DocumentProcessor in the process
+_EMBEDDERS: Dict[Tuple[str, str], Any] = {}
+_EMBEDDERS_LOCK = threading.Lock()
+
+
+def get_embedder(model_name: str, backend: str = "torch"):
+    """Return the process-wide embedding model for a name and backend, loading it on first use."""
+    key = (model_name, backend)
+    model = _EMBEDDERS.get(key)
+    if model is None:
+        with _EMBEDDERS_LOCK:
+            # Another thread may have loaded it while we waited for the lock
+            model = _EMBEDDERS.get(key)
+            if model is None:
+                model = _EMBEDDERS[key] = load_embedding_model(model_name, backend)
+    return model
+
 
 class DocumentProcessor:
-    def __init__(self, embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"):
-        self.embedding_model = SentenceTransformer(embedding_model)
+    # File suffixes extract_text_from_file can handle
+    SUPPORTED_FILE_TYPES = text_extraction.SUPPORTED_FILE_TYPES
+    
+    def __init__(self, embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2",
+                 embedding_cache_path: Optional[str] = None, embedding_backend: str = "torch"):
+        self.embedding_model = get_embedder(embedding_model, embedding_backend)
         self.tokenizer = tiktoken.get_encoding("cl100k_base")
+        
+        # Optional persistent cache so re-ingesting unchanged chunks skips the model
+        self.embedding_cache = None
+        if embedding_cache_path:
+            # Quantized models produce different vectors, so they get their own keys
+            cache_model_name = embedding_model if embedding_backend == "torch" else f"{embedding_model}:{embedding_backend}"
+            self.embedding_cache = EmbeddingCache(embedding_cache_path, cache_model_name)
     
     def extract_text_from_file(self, file_path: str, file_type: Optional[str] = None) -> str:
         """Extract text from various file types."""
-        if not file_type:
-            file_type = Path(file_path).suffix.lower()
+        return text_extraction.extract_text_from_file(file_path, file_type)
+    
+    @staticmethod
+    def _html_to_text(html) -> str:
+        """Strip markup from an HTML document."""
+        return text_extraction.html_to_text(html)
+    
+    def chunk_text(self, text: str, chunk_size: int = 500, chunk_overlap: int = 50,
+                   tokens: Optional[List[int]] = None) -> Dict[str, Any]:
+        """Split text into overlapping chunks.
         
-        try:
-            if file_type in ['.pdf']:
-                return self._extract_from_pdf(file_path)
-            elif file_type in ['.docx', '.doc']:
-                return self._extract_from_docx(file_path)
-            elif file_type in ['.txt', '.md']:
-                return self._extract_from_text(file_path)
-            elif file_type in ['.html', '.htm']:
-                return self._extract_from_html(file_path)
-            else:
-                raise ValueError(f"Unsupported file type: {file_type}")
-        except Exception as e:
-            raise Exception(f"Error extracting text from {file_path}: {str(e)}")
-    
-    def _extract_from_pdf(self, file_path: str) -> str:
-        """Extract text from PDF files."""
-        text = ""
-        with open(file_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-        return text.strip()
-    
-    def _extract_from_docx(self, file_path: str) -> str:
-        """Extract text from DOCX files."""
-        doc = DocxDocument(file_path)
-        text = ""
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
-        return text.strip()
-    
-    def _extract_from_text(self, file_path: str) -> str:
-        """Extract text from plain text files."""
-        with open(file_path, 'r', encoding='utf-8') as file:
-            return file.read().strip()
-    
-    def _extract_from_html(self, file_path: str) -> str:
-        """Extract text from HTML files."""
-        with open(file_path, 'r', encoding='utf-8') as file:
-            soup = BeautifulSoup(file.read(), 'html.parser')
-            return soup.get_text().strip()
-    
-    def chunk_text(self, text: str, chunk_size: int = 500, chunk_overlap: int = 50) -> List[Dict[str, Any]]:
-        """Split text into overlapping chunks."""
-        tokens = self.tokenizer.encode(text)
-        chunks = []
-        
-        start = 0
-        chunk_id = 0
-        
-        while start < len(tokens):
-            end = min(start + chunk_size, len(tokens))
-            chunk_tokens = tokens[start:end]
-            chunk_text = self.tokenizer.decode(chunk_tokens)
-            
-            chunks.append({
-                'id': chunk_id,
-                'text': chunk_text.strip(),
-                'start_token': start,
-                'end_token': end,
-                'token_count': len(chunk_tokens)
-            })
-            
-            chunk_id += 1
-            start = end - chunk_overlap
-            
-            if start >= len(tokens):
-                break
+        Chunks are returned column-wise: ``ids``, ``start_tokens``,
+        ``end_tokens`` and ``token_counts`` are integer arrays and ``texts``
+        is a list of strings, all aligned by position. Pass ``tokens`` when
+        the text has already been encoded to avoid tokenizing it a second time.
+        Every path encodes with ``encode_ordinary``, which reads special-token
+        strings such as ``<|endoftext|>`` as plain text instead of raising.
+        """
+        if tokens is None:
+            tokens = self.tokenizer.encode_ordinary(text)
+        
+        n = len(tokens)
+        stride = chunk_size - chunk_overlap
+        if stride <= 0:
+            raise ValueError("chunk_overlap must be smaller than chunk_size")
+        
+        # Windows start every `stride` tokens until one reaches the end
+        num_chunks = max(1, (n - chunk_overlap + stride - 1) // stride) if n else 0
+        starts = np.arange(0, num_chunks * stride, stride)
+        ends = np.minimum(starts + chunk_size, n)
+        
+        # Slice chunk text out of the original bytes instead of decoding
+        # every (overlapping) window separately
+        start_list = starts.tolist()
+        end_list = ends.tolist()
+        offsets = self._byte_offsets(tokens, set(start_list).union(end_list))
+        text_bytes = text.encode('utf-8')
+        
+        texts = [
+            text_bytes[offsets[start]:offsets[end]].decode('utf-8', errors='replace').strip()
+            for start, end in zip(start_list, end_list)
+        ]
+        
+        return {
+            'ids': np.arange(num_chunks),
+            'texts': texts,
+            'start_tokens': starts,
+            'end_tokens': ends,
+            'token_counts': ends - starts
+        }
+    
+    def iter_chunks(self, file_path: str, chunk_tokens: int = 200, overlap_tokens: int = 20,
+                    min_tokens: int = 100) -> Iterator[str]:
+        """Yield chunk texts while scanning a document paragraph by paragraph.
+        
+        Paragraphs longer than ``chunk_tokens`` are split on sentence ends,
+        then on whitespace, and text with no separator left (CJK, long URLs)
+        is sliced by tokens. Pieces are packed into chunks of at most
+        ``chunk_tokens`` tokens, each starting with the last ``overlap_tokens``
+        tokens of the previous chunk; the overlap shrinks rather than push a
+        chunk over the limit. A trailing chunk with fewer than ``min_tokens``
+        new tokens is extended back over the previous one up to the limit.
+        Only the current window is held in memory.
+        
+        Ingestion still goes through ``chunk_text``: stored chunks keep its
+        500/50 token windows, which ids, embedding cache keys and existing
+        indexes depend on, so this splitter is only used for streaming reads.
+        """
+        separators = {joiner: self.tokenizer.encode_ordinary(joiner) for joiner in ("\n\n", " ", "")}
+        chunk: List[int] = []
+        carried = 0  # tokens at the start of chunk carried over from the previous one
+        fresh = 0
+        pending = None
+        
+        for paragraph in self._iter_paragraphs(file_path):
+            # Tokenize once per paragraph; only oversized ones are split and re-encoded
+            for piece, joiner in self._split_piece(paragraph, self.tokenizer.encode_ordinary(paragraph), chunk_tokens):
+                separator = separators[joiner] if chunk else []
+                if fresh and len(chunk) + len(separator) + len(piece) > chunk_tokens:
+                    if pending is not None:
+                        yield self._decode_chunk(pending)
+                    pending = chunk
+                    
+                    # Carry a token-level tail of the finished chunk into the next one
+                    chunk = chunk[-overlap_tokens:] if overlap_tokens > 0 else []
+                    carried = len(chunk)
+                    fresh = 0
+                    separator = separators[joiner] if chunk else []
+                
+                # Give up carried tokens, then the separator, rather than exceed the limit
+                excess = len(chunk) + len(separator) + len(piece) - chunk_tokens
+                if excess > 0:
+                    dropped = min(excess, len(chunk))
+                    chunk = chunk[dropped:]
+                    carried -= dropped
+                    if excess > dropped:
+                        separator = []
+                
+                chunk.extend(separator)
+                chunk.extend(piece)
+                fresh += len(separator) + len(piece)
+        
+        if pending is not None:
+            yield self._decode_chunk(pending)
+            if 0 < fresh < min_tokens:
+                chunk = (pending + chunk[carried:])[-chunk_tokens:]
+        if fresh:
+            yield self._decode_chunk(chunk)
+    
+    def _iter_paragraphs(self, file_path: str) -> Iterator[str]:
+        """Yield the non-empty paragraphs of a document.
+        
+        Plain text and Markdown are scanned through a read-only mmap, so
+        the file is never loaded as a whole; other types are extracted first.
+        """
+        path = Path(file_path)
+        if path.suffix.lower() in ('.txt', '.md'):
+            with open(path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    start = 0
+                    for match in _PARAGRAPH_BREAK.finditer(mapped):
+                        paragraph = mapped[start:match.start()].decode('utf-8', errors='replace').strip()
+                        if paragraph:
+                            yield paragraph
+                        start = match.end()
+                    paragraph = mapped[start:].decode('utf-8', errors='replace').strip()
+                    if paragraph:
+                        yield paragraph
+        else:
+            text = self.extract_text_from_file(str(path), path.suffix.lower())
+            for paragraph in _PARAGRAPH_BREAK.split(text.encode('utf-8')):
+                paragraph = paragraph.decode('utf-8').strip()
+                if paragraph:
+                    yield paragraph
+    
+    def _split_piece(self, text: str, tokens: List[int], limit: int, joiner: str = "\n\n",
+                     level: int = 0) -> Iterator[Tuple[List[int], str]]:
+        """Recursively split text over ``limit`` tokens on finer separators.
+        
+        Yields ``(tokens, joiner)`` pairs, where ``joiner`` is the text that
+        separated the piece from the one before it.
+        """
+        if len(tokens) <= limit:
+            yield tokens, joiner
+        elif level < len(_SUBSPLITS):
+            parts = [part for part in _SUBSPLITS[level].split(text) if part]
+            for i, part in enumerate(parts):
+                part_tokens = tokens if len(parts) == 1 else self.tokenizer.encode_ordinary(part)
+                yield from self._split_piece(part, part_tokens, limit, joiner if i == 0 else " ", level + 1)
+        else:
+            # No separator left, so slice the tokens themselves
+            start = 0
+            while start < len(tokens):
+                end = self._char_boundary(tokens, start, min(start + limit, len(tokens)))
+                yield tokens[start:end], joiner if start == 0 else ""
+                start = end
+    
+    def _char_boundary(self, tokens: List[int], start: int, end: int) -> int:
+        """Move ``end`` back so tokens[start:end] does not cut a UTF-8 character in two."""
+        # Byte-level tokens split a character over at most four tokens
+        for cut in range(end, max(start, end - 4), -1):
+            try:
+                self.tokenizer.decode_bytes(tokens[start:cut]).decode('utf-8')
+                return cut
+            except UnicodeDecodeError:
+                pass
+        return end
+    
+    def _decode_chunk(self, tokens: List[int]) -> str:
+        """Decode chunk tokens, dropping a character cut in two by the carried overlap."""
+        return self.tokenizer.decode_bytes(tokens).decode('utf-8', errors='ignore').strip()
+    
+    def _byte_offsets(self, tokens: List[int], positions: Set[int]) -> Dict[int, int]:
+        """Map token positions to byte offsets in the UTF-8 encoded text.
+        
+        Only the segments between consecutive positions are decoded, so each
+        token is turned back into bytes exactly once.
+        """
+        offsets = {}
+        prev = 0
+        byte_pos = 0
+        for pos in sorted(positions):
+            byte_pos += len(self.tokenizer.decode_bytes(tokens[prev:pos]))
+            offsets[pos] = byte_pos
+            prev = pos
+        return offsets
+    
+    def generate_embeddings(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        """Generate L2-normalized embeddings for a list of texts.
         
-        return chunks
+        When an embedding cache is configured, only texts whose content hash
+        is not cached yet are run through the model.
+        """
+        if self.embedding_cache is None or not texts:
+            return self._encode(texts, batch_size)
+        
+        hashes = [EmbeddingCache.hash_text(text) for text in texts]
+        cached = self.embedding_cache.get_many(list(set(hashes)))
+        
+        # Encode each missing text once, even if it appears several times
+        missing = {}
+        for text_hash, text in zip(hashes, texts):
+            if text_hash not in cached and text_hash not in missing:
+                missing[text_hash] = text
+        
+        if missing:
+            new_embeddings = self._encode(list(missing.values()), batch_size)
+            fresh = list(zip(missing.keys(), new_embeddings))
+            self.embedding_cache.put_many(fresh)
+            cached.update(fresh)
+        
+        return np.vstack([cached[text_hash] for text_hash in hashes]).astype(np.float32, copy=False)
     
-    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for a list of texts."""
-        return self.embedding_model.encode(texts).tolist()
+    def _encode(self, texts: List[str], batch_size: int) -> np.ndarray:
+        """Run the embedding model over a list of texts.
+        
+        ``SentenceTransformer.encode`` already sorts inputs by length before
+        batching, so padding waste is bounded without sorting here.
+        """
+        return self.embedding_model.encode(
+            texts,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
     
     def process_document(self, file_path: str, chunk_size: int = 500, chunk_overlap: int = 50) -> Dict[str, Any]:
         """Process a document: extract text, chunk it, and generate embeddings."""
+        document = self._read_document(file_path, chunk_size, chunk_overlap)
+        
+        # Generate embeddings, stored as one (num_chunks, dim) array
+        chunks = document['chunks']
+        chunks['embeddings'] = self.generate_embeddings(chunks['texts'])
+        
+        return document
+    
+    def _read_document(self, file_path: str, chunk_size: int, chunk_overlap: int) -> Dict[str, Any]:
+        """Extract and chunk a document without embedding it."""
         file_type = Path(file_path).suffix.lower()
         filename = Path(file_path).name
         
@@ -104,15 +323,8 @@ class DocumentProcessor:
         text = self.extract_text_from_file(file_path, file_type)
         
         # Create chunks
-        chunks = self.chunk_text(text, chunk_size, chunk_overlap)
-        
-        # Generate embeddings
-        chunk_texts = [chunk['text'] for chunk in chunks]
-        embeddings = self.generate_embeddings(chunk_texts)
-        
-        # Add embeddings to chunks
-        for i, chunk in enumerate(chunks):
-            chunk['embedding'] = embeddings[i]
+        tokens = self.tokenizer.encode_ordinary(text)
+        chunks = self.chunk_text(text, chunk_size, chunk_overlap, tokens=tokens)
         
         return {
             'filename': filename,
@@ -120,46 +332,179 @@ class DocumentProcessor:
             'content': text,
             'chunks': chunks,
             'metadata': {
-                'total_tokens': len(self.tokenizer.encode(text)),
-                'total_chunks': len(chunks),
+                'total_tokens': len(tokens),
+                'total_chunks': len(chunks['texts']),
                 'chunk_size': chunk_size,
                 'chunk_overlap': chunk_overlap
             }
         }
     
+    async def ingest_documents_async(self, file_paths: List[str], vector_store, chunk_size: int = 500,
+                                     chunk_overlap: int = 50, queue_size: int = 4) -> List[Dict[str, Any]]:
+        """Read, embed and upsert documents as a pipeline of three stages.
+        
+        Each stage runs its blocking work in a thread and hands documents on
+        through a bounded queue, so the next file is read and chunked while
+        the current one is embedded and the previous one is written to
+        ``vector_store``. Returns the processed documents in input order.
+        """
+        read_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        write_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        documents = []
+        
+        async def read():
+            try:
+                for file_path in file_paths:
+                    await read_queue.put(await asyncio.to_thread(self._read_document, str(file_path), chunk_size, chunk_overlap))
+            finally:
+                await read_queue.put(None)
+        
+        async def embed():
+            try:
+                while (document := await read_queue.get()) is not None:
+                    chunks = document['chunks']
+                    chunks['embeddings'] = await asyncio.to_thread(self.generate_embeddings, chunks['texts'])
+                    await write_queue.put(document)
+            finally:
+                await write_queue.put(None)
+        
+        async def write():
+            while (document := await write_queue.get()) is not None:
+                await asyncio.to_thread(vector_store.add_documents, [document])
+                documents.append(document)
+        
+        stages = [asyncio.ensure_future(stage()) for stage in (read, embed, write)]
+        try:
+            await asyncio.gather(*stages)
+        except BaseException:
+            # A failed stage stops consuming its queue; cancel the rest so they don't block on it
+            for stage in stages:
+                stage.cancel()
+            raise
+        await asyncio.to_thread(vector_store.flush)
+        return documents
+    
+    def process_documents(self, file_paths: List[str], chunk_size: int = 500, chunk_overlap: int = 50,
+                          num_workers: int = 1) -> List[Dict[str, Any]]:
+        """Process several documents, tokenizing and embedding them in batches.
+        
+        With ``num_workers > 1`` text extraction (PDF/DOCX/HTML parsing) runs
+        in a pool of worker processes that only import ``text_extraction``;
+        texts are tokenized and chunked here as they stream back. Embedding
+        stays in this process so the model is loaded once and every chunk
+        goes through one batched call. Worker start-up costs a few hundred
+        milliseconds, so this only pays off for large or many documents.
+        """
+        paths = [Path(file_path) for file_path in file_paths]
+        sources = [(path.name, path.suffix.lower(), {}) for path in paths]
+        if num_workers <= 1 or len(paths) <= 1:
+            texts = [self.extract_text_from_file(str(path), path.suffix.lower()) for path in paths]
+            return self._build_documents(texts, sources, chunk_size, chunk_overlap)
+        
+        texts, token_lists, chunk_lists = [], [], []
+        # spawn avoids forking a process that may hold model threads or a CUDA context
+        with multiprocessing.get_context('spawn').Pool(min(num_workers, len(paths))) as pool:
+            for text in pool.imap(text_extraction.extract_text_from_file, [str(path) for path in paths]):
+                tokens = self.tokenizer.encode_ordinary(text)
+                texts.append(text)
+                token_lists.append(tokens)
+                chunk_lists.append(self.chunk_text(text, chunk_size, chunk_overlap, tokens=tokens))
+        return self._embed_documents(texts, token_lists, chunk_lists, sources, chunk_size, chunk_overlap)
+    
+    def _build_documents(self, texts: List[str], sources: List[tuple], chunk_size: int,
+                         chunk_overlap: int) -> List[Dict[str, Any]]:
+        """Chunk and embed extracted texts; ``sources`` holds (filename, file_type, metadata) per text."""
+        # Tokenize all documents at once; tiktoken releases the GIL per thread
+        token_lists = self.tokenizer.encode_ordinary_batch(texts, num_threads=os.cpu_count() or 1)
+        chunk_lists = [
+            self.chunk_text(text, chunk_size, chunk_overlap, tokens=tokens)
+            for text, tokens in zip(texts, token_lists)
+        ]
+        return self._embed_documents(texts, token_lists, chunk_lists, sources, chunk_size, chunk_overlap)
+    
+    def _embed_documents(self, texts: List[str], token_lists: List[List[int]], chunk_lists: List[Dict[str, Any]],
+                         sources: List[tuple], chunk_size: int, chunk_overlap: int) -> List[Dict[str, Any]]:
+        """Embed chunked texts and assemble the document dicts."""
+        # Generate embeddings for every chunk of every document in one call
+        chunk_texts = [chunk_text for chunks in chunk_lists for chunk_text in chunks['texts']]
+        embeddings = self.generate_embeddings(chunk_texts)
+        
+        documents = []
+        offset = 0
+        for (filename, file_type, metadata), text, tokens, chunks in zip(sources, texts, token_lists, chunk_lists):
+            # Each document gets a view of its rows, not a copy
+            num_chunks = len(chunks['texts'])
+            chunks['embeddings'] = embeddings[offset:offset + num_chunks]
+            offset += num_chunks
+            
+            documents.append({
+                'filename': filename,
+                'file_type': file_type,
+                'content': text,
+                'chunks': chunks,
+                'metadata': {
+                    **metadata,
+                    'total_tokens': len(tokens),
+                    'total_chunks': len(chunks['texts']),
+                    'chunk_size': chunk_size,
+                    'chunk_overlap': chunk_overlap
+                }
+            })
+        
+        return documents
+    
     def process_url(self, url: str, chunk_size: int = 500, chunk_overlap: int = 50) -> Dict[str, Any]:
         """Process content from a URL."""
         try:
-            response = requests.get(url, timeout=30)
+            response = _client.get(url)
             response.raise_for_status()
             
             # Parse HTML content
-            soup = BeautifulSoup(response.content, 'html.parser')
-            text = soup.get_text().strip()
+            text = self._html_to_text(response.content)
             
             # Create chunks
-            chunks = self.chunk_text(text, chunk_size, chunk_overlap)
+            tokens = self.tokenizer.encode_ordinary(text)
+            chunks = self.chunk_text(text, chunk_size, chunk_overlap, tokens=tokens)
             
             # Generate embeddings
-            chunk_texts = [chunk['text'] for chunk in chunks]
-            embeddings = self.generate_embeddings(chunk_texts)
-            
-            # Add embeddings to chunks
-            for i, chunk in enumerate(chunks):
-                chunk['embedding'] = embeddings[i]
+            chunks['embeddings'] = self.generate_embeddings(chunks['texts'])
             
             return {
-                'filename': f"web_content_{url.replace('/', '_').replace(':', '')}",
+                'filename': self._url_filename(url),
                 'file_type': 'html',
                 'content': text,
                 'chunks': chunks,
                 'metadata': {
                     'url': url,
-                    'total_tokens': len(self.tokenizer.encode(text)),
-                    'total_chunks': len(chunks),
+                    'total_tokens': len(tokens),
+                    'total_chunks': len(chunks['texts']),
                     'chunk_size': chunk_size,
                     'chunk_overlap': chunk_overlap
                 }
             }
         except Exception as e:
             raise Exception(f"Error processing URL {url}: {str(e)}")
+    
+    async def process_urls(self, urls: List[str], chunk_size: int = 500, chunk_overlap: int = 50) -> List[Dict[str, Any]]:
+        """Fetch several URLs concurrently and process their content."""
+        async with httpx.AsyncClient(http2=True, limits=_HTTP_LIMITS, timeout=30, follow_redirects=True) as client:
+            responses = await asyncio.gather(*(client.get(url) for url in urls), return_exceptions=True)
+        
+        for url, response in zip(urls, responses):
+            try:
+                if isinstance(response, Exception):
+                    raise response
+                response.raise_for_status()
+            except Exception as e:
+                raise Exception(f"Error processing URL {url}: {str(e)}")
+        
+        # Parsing, chunking and embedding are CPU-bound, keep them off the event loop
+        texts = await asyncio.gather(*(asyncio.to_thread(self._html_to_text, response.content) for response in responses))
+        sources = [(self._url_filename(url), 'html', {'url': url}) for url in urls]
+        return await asyncio.to_thread(self._build_documents, list(texts), sources, chunk_size, chunk_overlap)
+    
+    @staticmethod
+    def _url_filename(url: str) -> str:
+        """Build the pseudo filename used for web content."""
+        return f"web_content_{url.replace('/', '_').replace(':', '')}"
+
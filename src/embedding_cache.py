@@ -0,0 +1,58 @@
+import hashlib
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Tuple
+import numpy as np
+
+
+class EmbeddingCache:
+    """Persistent SQLite cache of embeddings keyed by model name and content hash."""
+    
+    # SQLite limits the number of bound parameters per statement
+    _QUERY_BATCH = 500
+    
+    def __init__(self, path: str, model_name: str):
+        self.model_name = model_name
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, hash TEXT NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (model, hash))"
+        )
+        self._conn.commit()
+    
+    @staticmethod
+    def hash_text(text: str) -> str:
+        """Hash a text for use as a cache key."""
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+    
+    def get_many(self, hashes: List[str]) -> Dict[str, np.ndarray]:
+        """Return the cached embeddings found for the given hashes."""
+        found = {}
+        with self._lock:
+            for start in range(0, len(hashes), self._QUERY_BATCH):
+                batch = hashes[start:start + self._QUERY_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({placeholders})",
+                    (self.model_name, *batch)
+                )
+                for text_hash, blob in rows:
+                    found[text_hash] = np.frombuffer(blob, dtype=np.float32)
+        return found
+    
+    def put_many(self, items: Iterable[Tuple[str, np.ndarray]]):
+        """Store embeddings for the given hashes."""
+        rows = [
+            (self.model_name, text_hash, np.asarray(vector, dtype=np.float32).tobytes())
+            for text_hash, vector in items
+        ]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)", rows)
+            self._conn.commit()
+    
+    def close(self):
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
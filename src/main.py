@@ -4,18 +4,17 @@ RAG Chatbot - Main Application
 A comprehensive RAG-powered chatbot with multi-channel support
 """
 
-import os
 import sys
 import asyncio
+import importlib.util
 from pathlib import Path
 
 # Add the project root to the Python path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from src.rag_system import RAGSystem, ConversationManager
+from src.rag_system import RAGSystem, ConversationManager, create_conversation_manager
 from src.slack_integration import start_slack_bot
-from src.whatsapp_integration import start_whatsapp_bot
 from config.settings import settings
 
 
@@ -28,7 +27,7 @@ def initialize_system():
     print(f"✅ RAG System initialized with {settings.vector_db_type} vector store")
     
     # Initialize conversation manager
-    conversation_manager = ConversationManager()
+    conversation_manager = create_conversation_manager()
     print("✅ Conversation Manager initialized")
     
     return rag_system, conversation_manager
@@ -43,26 +42,39 @@ def start_integrations(rag_system: RAGSystem, conversation_manager: Conversation
     if slack_bot:
         print("✅ Slack integration started")
     
-    # Start WhatsApp bot
-    whatsapp_bot = start_whatsapp_bot(rag_system, conversation_manager)
-    if whatsapp_bot:
-        print("✅ WhatsApp integration started")
+    # The WhatsApp webhook is served by the web app itself
+    if settings.twilio_account_sid and settings.twilio_auth_token:
+        print("✅ WhatsApp integration enabled on the web app")
+    else:
+        print("Twilio credentials not configured. Skipping WhatsApp integration.")
     
-    return slack_bot, whatsapp_bot
+    return slack_bot
 
 
-def start_web_app():
+def start_web_app(rag_system: RAGSystem, conversation_manager: ConversationManager, workers: int = 1):
     """Start the FastAPI web application."""
     import uvicorn
-    from src.web_app import app
     
-    print(f"\n🌐 Starting web application on {settings.host}:{settings.port}")
+    print(f"\n🌐 Starting web application on {settings.host}:{settings.port} ({workers} workers)")
+    
+    if workers == 1:
+        # Serve in this process so the web app shares the Slack bot's RAG system and
+        # history; a second FAISSVectorStore on the same files would overwrite its writes
+        from src import web_app
+        web_app.rag_system = rag_system
+        web_app.conversation_manager = conversation_manager
+        app = web_app.app
+    else:
+        # Multiple workers need the app as an import string (only allowed with shared state)
+        app = "src.web_app:app"
     
-    # Start the web app
     uvicorn.run(
         app,
         host=settings.host,
         port=settings.port,
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        http="httptools" if importlib.util.find_spec("httptools") else "auto",
+        workers=workers,
         log_level="info"
     )
 
@@ -85,7 +97,7 @@ def display_startup_info():
         print(f"   • Slack Commands: http://{settings.host}:3000/slack/commands")
     
     if settings.twilio_account_sid:
-        print(f"   • WhatsApp Webhook: http://{settings.host}:3001/whatsapp/webhook")
+        print(f"   • WhatsApp Webhook: http://{settings.host}:{settings.port}/whatsapp/webhook")
     
     print("\n📝 Usage Instructions:")
     print("1. Open the web interface to upload documents and chat")
@@ -112,6 +124,9 @@ def main():
     ╚═╝  ╚═╝╚═╝  ╚═╝ ╚═════╝      ╚═════╝╚═╝  ╚═╝╚═╝  ╚═╝   ╚═╝   ╚═════╝  ╚═════╝    ╚═╝   
     """)
         
+        # Fail fast on a worker count the configured stores cannot support
+        workers = settings.server_workers()
+        
         # Initialize system
         rag_system, conversation_manager = initialize_system()
         
@@ -122,7 +137,7 @@ def main():
         display_startup_info()
         
         # Start web application (this blocks)
-        start_web_app()
+        start_web_app(rag_system, conversation_manager, workers)
         
     except KeyboardInterrupt:
         print("\n👋 Shutting down RAG Chatbot...")
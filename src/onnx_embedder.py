@@ -0,0 +1,79 @@
+from pathlib import Path
+from typing import List, Union
+import numpy as np
+
+try:
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+    OPTIMUM_AVAILABLE = True
+except ImportError:
+    OPTIMUM_AVAILABLE = False
+
+
+class OnnxEmbeddingModel:
+    """Int8-quantized ONNX Runtime encoder with a SentenceTransformer-style ``encode``."""
+    
+    QUANTIZED_FILE = "model_quantized.onnx"
+    
+    def __init__(self, model_name: str, model_dir: str = "onnx", max_seq_length: int = 256):
+        if not OPTIMUM_AVAILABLE:
+            raise ImportError("ONNX embeddings require optimum. Install with: pip install optimum[onnxruntime]")
+        
+        export_dir = Path(model_dir) / model_name.replace('/', '__')
+        if not (export_dir / self.QUANTIZED_FILE).exists():
+            self._export(model_name, export_dir)
+        
+        self.model = ORTModelForFeatureExtraction.from_pretrained(
+            export_dir,
+            file_name=self.QUANTIZED_FILE,
+            provider="CPUExecutionProvider"
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(export_dir)
+        self.max_seq_length = max_seq_length
+    
+    @staticmethod
+    def _export(model_name: str, export_dir: Path):
+        """Export the model to ONNX once and quantize its weights to int8."""
+        model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+        model.save_pretrained(export_dir)
+        AutoTokenizer.from_pretrained(model_name).save_pretrained(export_dir)
+        
+        quantizer = ORTQuantizer.from_pretrained(model)
+        qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+        quantizer.quantize(save_dir=export_dir, quantization_config=qconfig)
+    
+    def get_sentence_embedding_dimension(self) -> int:
+        """Return the size of the produced embeddings."""
+        return self.model.config.hidden_size
+    
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = False, show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        """Encode sentences into mean-pooled embeddings."""
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+        
+        # Sort by length so each batch pads to a similar size
+        order = np.argsort([-len(sentence) for sentence in sentences], kind="stable")
+        embeddings = np.empty((len(sentences), self.get_sentence_embedding_dimension()), dtype=np.float32)
+        
+        for start in range(0, len(sentences), batch_size):
+            batch_idx = order[start:start + batch_size]
+            inputs = self.tokenizer(
+                [sentences[i] for i in batch_idx],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np"
+            )
+            hidden = self.model(**inputs).last_hidden_state
+            
+            # Mean pooling over non-padding tokens, as sentence-transformers does
+            mask = inputs["attention_mask"][..., None].astype(np.float32)
+            embeddings[batch_idx] = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        
+        if normalize_embeddings:
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        
+        return embeddings[0] if single else embeddings
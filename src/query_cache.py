@@ -0,0 +1,67 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+import numpy as np
+
+
+class QueryCache:
+    """Thread-safe LRU cache of vector store search results with a TTL.
+    
+    Keys are built from the raw bytes of the query embedding and ``top_k``,
+    so only exactly repeated searches hit. Stores clear the cache whenever
+    their contents change.
+    """
+    
+    def __init__(self, max_size: int = 2000, ttl_seconds: float = 600.0):
+        self.max_size = max_size
+        self.ttl = ttl_seconds
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def make_key(query_embedding, top_k: int) -> Hashable:
+        """Key a search by its embedding bytes and result count."""
+        vector = np.ascontiguousarray(query_embedding, dtype=np.float32)
+        return hashlib.blake2b(vector.tobytes(), digest_size=16).digest(), top_k
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return cached results for a key, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+    
+    def put(self, key: Hashable, value: Any):
+        """Cache results for a key, evicting the least recently used entry when full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        """Drop all entries (hit/miss counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return size, hit/miss counts and the hit rate."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
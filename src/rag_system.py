@@ -1,12 +1,48 @@
+import re
 import json
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Executor
+from functools import lru_cache
+from itertools import islice
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
+from dataclasses import dataclass, asdict, field
+import numpy as np
+import orjson
 import openai
-from sentence_transformers import SentenceTransformer
 from .vector_store import VectorStore, create_vector_store
 from .document_processor import DocumentProcessor
+from .batching import MicroBatcher
+from .semantic_cache import SemanticCache
+from .query_cache import QueryCache
 from config.settings import settings
 
+try:
+    import redis
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+# Built once at import; every request starts its message list with it
+_SYSTEM_MSG = {
+    "role": "system",
+    "content": """You are a helpful AI assistant that answers questions based on the provided context. 
+                Follow these guidelines:
+                1. Answer questions using only the information provided in the context
+                2. Be accurate and concise
+                3. If the context doesn't contain enough information, say so clearly
+                4. Cite relevant sources when appropriate
+                5. Maintain a professional and helpful tone
+                """
+}
+
+# Messages with nothing to retrieve are answered without running the pipeline
+_SMALLTALK = frozenset({"hi", "hello", "hey", "thanks", "thank you", "ok", "bye"})
+_ALNUM = re.compile(r"\w")
+
 
 @dataclass
 class RAGResponse:
@@ -15,25 +51,68 @@ class RAGResponse:
     sources: List[Dict[str, Any]]
     confidence: float
     metadata: Dict[str, Any]
+    source_ids: List[str] = field(default_factory=list)  # Recorded in conversation history
+    
+    def to_json(self) -> bytes:
+        """Serialize the response for the exact-match answer cache."""
+        return orjson.dumps(asdict(self), default=str, option=orjson.OPT_SERIALIZE_NUMPY)
+    
+    @classmethod
+    def from_json(cls, data) -> "RAGResponse":
+        """Rebuild a response serialized with ``to_json``."""
+        return cls(**orjson.loads(data))
+
+
+def normalize_query(question: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace so trivially different questions match."""
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s]", "", question.lower())).strip()
+
+
+def is_smalltalk(question: str) -> bool:
+    """Return True for greetings, thanks and messages without any word characters."""
+    normalized = normalize_query(question)
+    return normalized in _SMALLTALK or not _ALNUM.search(normalized)
+
+
+_EXACT_CACHE_PREFIX = "rag:qhash:"
+
+
+def exact_cache_key(question: str, conversation_history: Optional[List[Dict[str, str]]] = None) -> str:
+    """Redis key of a question and the history sent with it in the exact-match answer cache."""
+    digest = hashlib.sha256(normalize_query(question).encode('utf-8'))
+    for msg in (conversation_history or [])[-settings.rag_history_window:]:
+        digest.update(f"\x00{msg['role']}\x00{msg['content']}".encode('utf-8'))
+    return f"{_EXACT_CACHE_PREFIX}{digest.hexdigest()}"
 
 
 class RAGSystem:
     """Retrieval-Augmented Generation system."""
     
     def __init__(self, vector_store: VectorStore = None):
-        # Initialize OpenAI client
+        # Initialize OpenAI clients
         openai.api_key = settings.openai_api_key
+        self.async_client = openai.AsyncOpenAI(api_key=settings.openai_api_key)
         
-        # Initialize embedding model
-        self.embedding_model = SentenceTransformer(settings.embedding_model)
-        
-        # Initialize document processor
-        self.document_processor = DocumentProcessor(settings.embedding_model)
+        # Initialize document processor (its embedding model is shared for queries)
+        self.document_processor = DocumentProcessor(
+            settings.embedding_model,
+            embedding_cache_path=settings.embedding_cache_path,
+            embedding_backend=settings.embedding_backend
+        )
         
         # Initialize vector store
         if vector_store is None:
             vector_store_kwargs = {}
-            if settings.vector_db_type.lower() == "pinecone":
+            if settings.vector_db_type.lower() == "faiss":
+                vector_store_kwargs = {
+                    "index_type": settings.faiss_index_type,
+                    "hnsw_m": settings.faiss_hnsw_m,
+                    "ef_construction": settings.faiss_ef_construction,
+                    "ef_search": settings.faiss_ef_search,
+                    "quantization": settings.faiss_quantization,
+                    "use_gpu": settings.faiss_use_gpu
+                }
+            elif settings.vector_db_type.lower() == "pinecone":
                 vector_store_kwargs = {
                     "api_key": settings.pinecone_api_key,
                     "environment": settings.pinecone_environment
@@ -41,6 +120,35 @@ class RAGSystem:
             self.vector_store = create_vector_store(settings.vector_db_type, **vector_store_kwargs)
         else:
             self.vector_store = vector_store
+        
+        # Concurrent query embeddings (cache misses) are encoded in one forward pass
+        self._embed_batcher = None
+        if settings.embed_batch_window_ms > 0:
+            self._embed_batcher = MicroBatcher(
+                self._encode_queries,
+                settings.embed_batch_window_ms,
+                max_batch_size=settings.embed_batch_size
+            )
+        
+        # Caches for repeated questions: query embeddings and full responses
+        self._query_embedding = lru_cache(maxsize=settings.query_cache_size)(self._encode_query)
+        # Responses expire like search results; with shared state another process
+        # may ingest without clearing this one, so only Redis caches answers then
+        self._response_cache = None if settings.shared_state else QueryCache(max_size=settings.query_cache_size)
+        
+        # Near-duplicate questions, shared by every channel through cached_query
+        self.semantic_cache = SemanticCache(
+            self.embedding_dimension,
+            threshold=settings.semantic_cache_threshold,
+            ttl=settings.semantic_cache_ttl
+        )
+        # Exact repeats, shared across processes when REDIS_URL is set
+        self.exact_cache = redis.Redis.from_url(settings.redis_url) if settings.redis_url and REDIS_AVAILABLE else None
+        
+        # Concurrent retrievals are coalesced into one vector store call
+        self._search_batcher = None
+        if settings.search_batch_window_ms > 0:
+            self._search_batcher = MicroBatcher(self._search_batch, settings.search_batch_window_ms)
     
     def add_document(self, file_path: str) -> Dict[str, Any]:
         """Add a document to the knowledge base."""
@@ -50,6 +158,7 @@ class RAGSystem:
             
             # Add to vector store
             doc_ids = self.vector_store.add_documents([processed_doc])
+            self.clear_query_cache()
             
             return {
                 "status": "success",
@@ -64,6 +173,28 @@ class RAGSystem:
                 "error": str(e)
             }
     
+    def add_documents(self, file_paths: List[str]) -> Dict[str, Any]:
+        """Add several documents to the knowledge base in one batch."""
+        try:
+            # Process documents
+            processed_docs = self.document_processor.process_documents(file_paths)
+            
+            # Add to vector store, persisting once for the whole batch
+            doc_ids = self.vector_store.add_documents_bulk(processed_docs)
+            self.clear_query_cache()
+            
+            return {
+                "status": "success",
+                "filenames": [doc['filename'] for doc in processed_docs],
+                "chunks_added": len(doc_ids),
+                "doc_ids": doc_ids
+            }
+        except Exception as e:
+            return {
+                "status": "error",
+                "error": str(e)
+            }
+    
     def add_document_from_url(self, url: str) -> Dict[str, Any]:
         """Add content from a URL to the knowledge base."""
         try:
@@ -72,6 +203,7 @@ class RAGSystem:
             
             # Add to vector store
             doc_ids = self.vector_store.add_documents([processed_doc])
+            self.clear_query_cache()
             
             return {
                 "status": "success",
@@ -91,12 +223,16 @@ class RAGSystem:
         if top_k is None:
             top_k = settings.top_k_results
         
+        # Identical questions with the same recent history skip the whole pipeline
+        cache_key = self._query_cache_key(question, conversation_history, top_k)
+        if self._response_cache is not None:
+            cached = self._response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
         try:
-            # Generate query embedding
-            query_embedding = self.embedding_model.encode(question).tolist()
-            
             # Search for relevant documents
-            search_results = self.vector_store.search(query_embedding, top_k)
+            search_results = self._retrieve(question, top_k)
             
             if not search_results:
                 return RAGResponse(
@@ -106,8 +242,8 @@ class RAGSystem:
                     metadata={"error": "No relevant documents found"}
                 )
             
-            # Build context from search results
-            context = self._build_context(search_results)
+            # Build context from search results; sources follow the context's [Source N] order
+            context, search_results = self._build_context(search_results)
             
             # Generate response using LLM
             response = self._generate_response(question, context, conversation_history)
@@ -115,15 +251,21 @@ class RAGSystem:
             # Calculate confidence based on search scores
             confidence = self._calculate_confidence(search_results)
             
-            return RAGResponse(
+            rag_response = RAGResponse(
                 answer=response,
                 sources=search_results,
                 confidence=confidence,
                 metadata={
                     "context_length": len(context),
                     "sources_count": len(search_results)
-                }
+                },
+                source_ids=[result['id'] for result in search_results]
             )
+            
+            if self._response_cache is not None:
+                self._response_cache.put(cache_key, rag_response)
+            
+            return rag_response
         
         except Exception as e:
             return RAGResponse(
@@ -133,46 +275,172 @@ class RAGSystem:
                 metadata={"error": str(e)}
             )
     
-    def _build_context(self, search_results: List[Dict[str, Any]]) -> str:
-        """Build context string from search results."""
-        context_parts = []
-        for i, result in enumerate(search_results):
-            context_parts.append(f"[Source {i+1}] {result['filename']}:\n{result['text']}")
+    def cached_query(self, question: str, conversation_history: List[Dict[str, str]] = None) -> RAGResponse:
+        """Answer a question through the answer caches, falling back to ``query``.
+        
+        Exact repeats of a question with the same history are answered from
+        Redis when REDIS_URL is set. Answers depend on the history sent to the
+        LLM, so only questions without history use the semantic cache.
+        """
+        cache_key = exact_cache_key(question, conversation_history)
+        if self.exact_cache is not None:
+            cached = self.exact_cache.get(cache_key)
+            if cached is not None:
+                return RAGResponse.from_json(cached)
+        
+        query_embedding = None
+        rag_response = None
+        if not conversation_history:
+            query_embedding = self.embed_query(question)
+            rag_response = self.semantic_cache.get(query_embedding)
         
-        return "\n\n".join(context_parts)
+        if rag_response is None:
+            rag_response = self.query(question, conversation_history)
+            if "error" not in rag_response.metadata:
+                if query_embedding is not None:
+                    self.semantic_cache.put(query_embedding, rag_response)
+                if self.exact_cache is not None:
+                    self.exact_cache.setex(cache_key, settings.exact_cache_ttl, rag_response.to_json())
+        return rag_response
     
-    def _generate_response(self, question: str, context: str, conversation_history: List[Dict[str, str]] = None) -> str:
-        """Generate response using OpenAI GPT."""
+    async def stream_query(self, question: str, conversation_history: List[Dict[str, str]] = None,
+                           top_k: int = None, executor: Optional[Executor] = None) -> AsyncIterator[str]:
+        """Query the RAG system, yielding the answer as it is generated.
         
-        # Build conversation messages
-        messages = [
-            {
-                "role": "system",
-                "content": """You are a helpful AI assistant that answers questions based on the provided context. 
-                Follow these guidelines:
-                1. Answer questions using only the information provided in the context
-                2. Be accurate and concise
-                3. If the context doesn't contain enough information, say so clearly
-                4. Cite relevant sources when appropriate
-                5. Maintain a professional and helpful tone
-                """
-            }
+        Retrieval runs on ``executor``, or the loop's default executor if None.
+        """
+        if top_k is None:
+            top_k = settings.top_k_results
+        
+        # Embedding and vector search are blocking, keep them off the event loop
+        search_results = await asyncio.get_running_loop().run_in_executor(executor, self._retrieve, question, top_k)
+        
+        if not search_results:
+            yield "I don't have any relevant information to answer your question."
+            return
+        
+        context, _ = self._build_context(search_results)
+        messages = self._build_messages(question, context, conversation_history)
+        
+        stream = await self.async_client.chat.completions.create(
+            model=settings.llm_model,
+            messages=messages,
+            max_tokens=500,
+            temperature=0.7,
+            stream=True
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    
+    def _retrieve(self, question: str, top_k: int) -> List[Dict[str, Any]]:
+        """Embed the question and search the vector store."""
+        query_embedding = self._query_embedding(question)
+        if self._search_batcher is not None:
+            return self._search_batcher.submit((query_embedding, top_k))
+        return self.vector_store.search(query_embedding, top_k)
+    
+    def _search_batch(self, requests: List[tuple]) -> List[List[Dict[str, Any]]]:
+        """Run a batch of (query_embedding, top_k) searches as one vector store call."""
+        top_k = max(k for _, k in requests)
+        query_embeddings = np.asarray([embedding for embedding, _ in requests], dtype=np.float32)
+        results = self.vector_store.search_batch(query_embeddings, top_k)
+        return [query_results[:k] for query_results, (_, k) in zip(results, requests)]
+    
+    def embed_query(self, question: str) -> List[float]:
+        """Return the (cached) unit-length embedding for a question."""
+        return self._query_embedding(question)
+    
+    @property
+    def embedding_dimension(self) -> int:
+        """Size of the query and document embeddings."""
+        return self.document_processor.embedding_model.get_sentence_embedding_dimension()
+    
+    def _encode_query(self, question: str) -> List[float]:
+        """Generate the embedding for a query (memoized per question)."""
+        if self._embed_batcher is not None:
+            return self._embed_batcher.submit(question)
+        return self.document_processor.embedding_model.encode(question, normalize_embeddings=True).tolist()
+    
+    def _encode_queries(self, questions: List[str]) -> List[List[float]]:
+        """Embed a batch of queries with a single model call."""
+        embeddings = self.document_processor.embedding_model.encode(
+            questions,
+            batch_size=len(questions),
+            normalize_embeddings=True
+        )
+        return embeddings.tolist()
+    
+    @staticmethod
+    def _query_cache_key(question: str, conversation_history: Optional[List[Dict[str, str]]], top_k: int) -> str:
+        """Hash a question together with the history that is sent to the LLM."""
+        digest = hashlib.blake2b(question.encode('utf-8'), digest_size=16)
+        for msg in (conversation_history or [])[-settings.rag_history_window:]:
+            digest.update(f"\x00{msg['role']}\x00{msg['content']}".encode('utf-8'))
+        digest.update(f"\x00{top_k}".encode('utf-8'))
+        return digest.hexdigest()
+    
+    def clear_query_cache(self):
+        """Drop cached responses, e.g. after the knowledge base changed."""
+        if self._response_cache is not None:
+            self._response_cache.clear()
+        self.semantic_cache.clear()
+        
+        # Exact-match answers are shared by every process, so they are deleted in Redis
+        if self.exact_cache is not None:
+            keys = []
+            for key in self.exact_cache.scan_iter(match=f"{_EXACT_CACHE_PREFIX}*", count=1000):
+                keys.append(key)
+                if len(keys) >= 1000:
+                    self.exact_cache.unlink(*keys)
+                    keys = []
+            if keys:
+                self.exact_cache.unlink(*keys)
+    
+    def _build_context(self, search_results: List[Dict[str, Any]],
+                       max_tokens: Optional[int] = None) -> Tuple[str, List[Dict[str, Any]]]:
+        """Build context string from search results, within a token budget.
+        
+        Returns the context and the results reordered to match it: result i
+        is "[Source i+1]", followed by any results that did not fit the budget.
+        """
+        if max_tokens is None:
+            max_tokens = settings.max_context_length
+        
+        tokenizer = self.document_processor.tokenizer
+        selected = []
+        remaining = max_tokens
+        for result in search_results:
+            if remaining <= 0:
+                break
+            
+            # Stores report each chunk's token count from ingest, so only
+            # chunks without one, or that overflow the budget, are encoded
+            text = result['text']
+            token_count = result.get('token_count')
+            if token_count is None or token_count > remaining:
+                tokens = tokenizer.encode_ordinary(text)
+                token_count = len(tokens)
+                if token_count > remaining:
+                    text = tokenizer.decode(tokens[:remaining])
+                    token_count = remaining
+            
+            remaining -= int(token_count)
+            selected.append((result, text))
+        
+        # Order sources by id rather than score, so the same retrieved chunks
+        # always render to the same text and can share a cached prompt prefix
+        selected.sort(key=lambda item: item[0]['id'])
+        context_parts = [
+            f"[Source {i+1}] {result['filename']}:\n{text}" for i, (result, text) in enumerate(selected)
         ]
+        ordered = [result for result, _ in selected] + search_results[len(selected):]
         
-        # Add conversation history if provided
-        if conversation_history:
-            for msg in conversation_history[-5:]:  # Last 5 messages for context
-                messages.append({
-                    "role": msg["role"],
-                    "content": msg["content"]
-                })
-        
-        # Add current question with context
-        user_message = f"Context:\n{context}\n\nQuestion: {question}"
-        messages.append({
-            "role": "user",
-            "content": user_message
-        })
+        return "\n\n".join(context_parts), ordered
+    
+    def _generate_response(self, question: str, context: str, conversation_history: List[Dict[str, str]] = None) -> str:
+        """Generate response using OpenAI GPT."""
+        messages = self._build_messages(question, context, conversation_history)
         
         # Generate response
         response = openai.chat.completions.create(
@@ -184,14 +452,41 @@ class RAGSystem:
         
         return response.choices[0].message.content
     
+    def _build_messages(self, question: str, context: str,
+                        conversation_history: List[Dict[str, str]] = None) -> List[Dict[str, str]]:
+        """Build the chat messages sent to the LLM.
+        
+        Content is ordered from most to least stable (system prompt, retrieved
+        context, history, question) so OpenAI's automatic prompt caching can
+        reuse the longest possible prefix across turns.
+        """
+        messages = [_SYSTEM_MSG, {"role": "system", "content": f"Context:\n{context}"}]
+        
+        # Add conversation history if provided (last 5 messages for context).
+        # Stored messages also carry metadata, which the API does not accept.
+        if conversation_history:
+            messages.extend(
+                {"role": msg["role"], "content": msg["content"]}
+                for msg in conversation_history[-settings.rag_history_window:]
+            )
+        
+        # Add current question
+        messages.append({"role": "user", "content": f"Question: {question}"})
+        
+        return messages
+    
     def _calculate_confidence(self, search_results: List[Dict[str, Any]]) -> float:
         """Calculate confidence score based on search results."""
         if not search_results:
             return 0.0
         
         # Average of top search scores
-        scores = [result['score'] for result in search_results]
-        return sum(scores) / len(scores)
+        scores = np.fromiter(
+            (result['score'] for result in search_results),
+            dtype=np.float32,
+            count=len(search_results)
+        )
+        return float(scores.mean())
     
     def get_knowledge_base_stats(self) -> Dict[str, Any]:
         """Get statistics about the knowledge base."""
@@ -204,42 +499,229 @@ class RAGSystem:
     
     def delete_document(self, document_id: str) -> bool:
         """Delete a document from the knowledge base."""
-        return self.vector_store.delete_document(document_id)
+        deleted = self.vector_store.delete_document(document_id)
+        if deleted:
+            self.clear_query_cache()
+        return deleted
 
 
 class ConversationManager:
     """Manages conversation context and history."""
     
-    def __init__(self, max_history_length: int = 10):
-        self.conversations = {}
+    def __init__(self, max_history_length: int = 10, max_conversations: int = 1000):
+        # Least recently active conversations are evicted first
+        self.conversations: OrderedDict[str, deque] = OrderedDict()
         self.max_history_length = max_history_length
+        self.max_conversations = max_conversations
+        self._lock = threading.RLock()
     
     def add_message(self, conversation_id: str, role: str, content: str, metadata: Dict[str, Any] = None):
         """Add a message to the conversation history."""
-        if conversation_id not in self.conversations:
-            self.conversations[conversation_id] = []
-        
-        message = {
+        self._append(conversation_id, [{
             "role": role,
             "content": content,
             "metadata": metadata or {}
-        }
+        }])
+    
+    def add_messages(self, conversation_id: str, messages: List[Tuple[str, str]]):
+        """Add several (role, content) messages to the conversation history at once."""
+        self._append(conversation_id, [
+            {"role": role, "content": content, "metadata": {}}
+            for role, content in messages
+        ])
+    
+    def _append(self, conversation_id: str, messages: List[Dict[str, Any]]):
+        """Append messages under one lock acquisition and refresh the conversation's recency."""
+        with self._lock:
+            history = self.conversations.get(conversation_id)
+            if history is None:
+                # deque(maxlen) drops the oldest messages on extend
+                history = self.conversations[conversation_id] = deque(maxlen=self.max_history_length)
+            
+            history.extend(messages)
+            
+            # Keep only recently active conversations
+            self.conversations.move_to_end(conversation_id)
+            if len(self.conversations) > self.max_conversations:
+                self.conversations.popitem(last=False)
+    
+    def get_conversation_history(self, conversation_id: str, limit: Optional[int] = None) -> List[Dict[str, str]]:
+        """Get conversation history for a given conversation ID, optionally only the last ``limit`` messages."""
+        with self._lock:
+            history = self.conversations.get(conversation_id, ())
+            if limit:
+                return list(islice(history, max(len(history) - limit, 0), None))
+            return list(history)
+    
+    def clear_conversation(self, conversation_id: str):
+        """Clear conversation history for a given conversation ID."""
+        with self._lock:
+            self.conversations.pop(conversation_id, None)
+    
+    def get_all_conversations(self) -> List[str]:
+        """Get all conversation IDs."""
+        with self._lock:
+            return list(self.conversations.keys())
+
+
+class RedisConversationManager:
+    """Conversation history stored in Redis lists, shared across workers and restarts."""
+    
+    KEY_PREFIX = "conv:"
+    
+    def __init__(self, redis_url: str, max_history_length: int = 10, ttl: int = 86400):
+        if not REDIS_AVAILABLE:
+            raise ImportError("Redis is not installed. Install with: pip install redis")
         
-        self.conversations[conversation_id].append(message)
+        # One pooled client is shared by every request
+        self.redis = redis.Redis(connection_pool=redis.ConnectionPool.from_url(redis_url))
+        self.max_history_length = max_history_length
+        self.ttl = ttl
+    
+    def _key(self, conversation_id: str) -> str:
+        return f"{self.KEY_PREFIX}{conversation_id}"
+    
+    def add_message(self, conversation_id: str, role: str, content: str, metadata: Dict[str, Any] = None):
+        """Add a message to the conversation history."""
+        key = self._key(conversation_id)
+        message = orjson.dumps({
+            "role": role,
+            "content": content,
+            "metadata": metadata or {}
+        })
         
-        # Keep only recent messages
-        if len(self.conversations[conversation_id]) > self.max_history_length:
-            self.conversations[conversation_id] = self.conversations[conversation_id][-self.max_history_length:]
+        self._append(key, [message])
     
-    def get_conversation_history(self, conversation_id: str) -> List[Dict[str, str]]:
-        """Get conversation history for a given conversation ID."""
-        return self.conversations.get(conversation_id, [])
+    def add_messages(self, conversation_id: str, messages: List[Tuple[str, str]]):
+        """Add several (role, content) messages to the conversation history at once."""
+        self._append(self._key(conversation_id), [
+            orjson.dumps({"role": role, "content": content, "metadata": {}})
+            for role, content in messages
+        ])
+    
+    def _append(self, key: str, messages: List[bytes]):
+        """Append, keep only recent messages and refresh the TTL in one round trip."""
+        pipe = self.redis.pipeline()
+        pipe.rpush(key, *messages)
+        pipe.ltrim(key, -self.max_history_length, -1)
+        pipe.expire(key, self.ttl)
+        pipe.execute()
+    
+    def get_conversation_history(self, conversation_id: str, limit: Optional[int] = None) -> List[Dict[str, str]]:
+        """Get conversation history for a given conversation ID, optionally only the last ``limit`` messages."""
+        # Negative LRANGE indices fetch just the tail of the list
+        start = -limit if limit else 0
+        return [orjson.loads(message) for message in self.redis.lrange(self._key(conversation_id), start, -1)]
     
     def clear_conversation(self, conversation_id: str):
         """Clear conversation history for a given conversation ID."""
-        if conversation_id in self.conversations:
-            del self.conversations[conversation_id]
+        self.redis.delete(self._key(conversation_id))
     
     def get_all_conversations(self) -> List[str]:
         """Get all conversation IDs."""
-        return list(self.conversations.keys())
+        prefix_length = len(self.KEY_PREFIX)
+        return [key.decode('utf-8')[prefix_length:] for key in self.redis.scan_iter(match=f"{self.KEY_PREFIX}*")]
+
+
+class AsyncRedisConversationManager:
+    """Awaitable conversation history in Redis, for use on an event loop.
+    
+    Uses the same keys and message format as RedisConversationManager, so
+    both see the same conversations.
+    """
+    
+    KEY_PREFIX = RedisConversationManager.KEY_PREFIX
+    
+    def __init__(self, redis_url: str, max_history_length: int = 10, ttl: int = 86400):
+        if not REDIS_AVAILABLE:
+            raise ImportError("Redis is not installed. Install with: pip install redis")
+        
+        # redis.asyncio pools connections per client
+        self.redis = aioredis.from_url(redis_url)
+        self.max_history_length = max_history_length
+        self.ttl = ttl
+    
+    def _key(self, conversation_id: str) -> str:
+        return f"{self.KEY_PREFIX}{conversation_id}"
+    
+    async def add_message(self, conversation_id: str, role: str, content: str, metadata: Dict[str, Any] = None):
+        """Add a message to the conversation history."""
+        await self._append(self._key(conversation_id), [orjson.dumps({
+            "role": role,
+            "content": content,
+            "metadata": metadata or {}
+        })])
+    
+    async def add_messages(self, conversation_id: str, messages: List[Tuple[str, str]]):
+        """Add several (role, content) messages to the conversation history at once."""
+        await self._append(self._key(conversation_id), [
+            orjson.dumps({"role": role, "content": content, "metadata": {}})
+            for role, content in messages
+        ])
+    
+    async def _append(self, key: str, messages: List[bytes]):
+        """Append, keep only recent messages and refresh the TTL in one round trip."""
+        async with self.redis.pipeline() as pipe:
+            pipe.rpush(key, *messages)
+            pipe.ltrim(key, -self.max_history_length, -1)
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+    
+    async def get_conversation_history(self, conversation_id: str, limit: Optional[int] = None) -> List[Dict[str, str]]:
+        """Get conversation history for a given conversation ID, optionally only the last ``limit`` messages."""
+        start = -limit if limit else 0
+        return [orjson.loads(message) for message in await self.redis.lrange(self._key(conversation_id), start, -1)]
+    
+    async def clear_conversation(self, conversation_id: str):
+        """Clear conversation history for a given conversation ID."""
+        await self.redis.delete(self._key(conversation_id))
+    
+    async def get_all_conversations(self) -> List[str]:
+        """Get all conversation IDs."""
+        prefix_length = len(self.KEY_PREFIX)
+        return [key.decode('utf-8')[prefix_length:] async for key in self.redis.scan_iter(match=f"{self.KEY_PREFIX}*")]
+
+
+class AsyncConversationManager:
+    """Awaitable interface over an in-process ConversationManager, whose calls never block."""
+    
+    def __init__(self, manager: ConversationManager):
+        self.manager = manager
+    
+    async def add_message(self, conversation_id: str, role: str, content: str, metadata: Dict[str, Any] = None):
+        """Add a message to the conversation history."""
+        self.manager.add_message(conversation_id, role, content, metadata)
+    
+    async def add_messages(self, conversation_id: str, messages: List[Tuple[str, str]]):
+        """Add several (role, content) messages to the conversation history at once."""
+        self.manager.add_messages(conversation_id, messages)
+    
+    async def get_conversation_history(self, conversation_id: str, limit: Optional[int] = None) -> List[Dict[str, str]]:
+        """Get conversation history for a given conversation ID, optionally only the last ``limit`` messages."""
+        return self.manager.get_conversation_history(conversation_id, limit)
+    
+    async def clear_conversation(self, conversation_id: str):
+        """Clear conversation history for a given conversation ID."""
+        self.manager.clear_conversation(conversation_id)
+    
+    async def get_all_conversations(self) -> List[str]:
+        """Get all conversation IDs."""
+        return self.manager.get_all_conversations()
+
+
+def create_conversation_manager():
+    """Create a Redis-backed conversation manager when REDIS_URL is set, else an in-process one."""
+    if settings.redis_url:
+        return RedisConversationManager(settings.redis_url, ttl=settings.conversation_ttl)
+    return ConversationManager()
+
+
+def create_async_conversation_manager(manager=None):
+    """Create an awaitable conversation manager for async code.
+    
+    With REDIS_URL it talks to Redis through ``redis.asyncio``; otherwise it
+    wraps the in-process ``manager`` so async and threaded callers share history.
+    """
+    if settings.redis_url:
+        return AsyncRedisConversationManager(settings.redis_url, ttl=settings.conversation_ttl)
+    return AsyncConversationManager(manager if manager is not None else ConversationManager())
@@ -0,0 +1,101 @@
+import os
+import pickle
+import threading
+import time
+from typing import Any, List, Optional
+import numpy as np
+import faiss
+
+
+class SemanticCache:
+    """In-process cache of answers keyed by question-embedding similarity.
+    
+    Question embeddings (unit vectors) go into a FAISS inner-product index;
+    a lookup hits when a cached question within ``ttl`` seconds has cosine
+    similarity of at least ``threshold`` with the new one.
+    """
+    
+    # Neighbours checked per lookup, so an expired entry cannot hide a live one
+    _CANDIDATES = 4
+    
+    def __init__(self, dimension: int, threshold: float = 0.95, ttl: float = 300.0, max_entries: int = 10000):
+        self.dimension = dimension
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        
+        self.index = faiss.IndexFlatIP(dimension)
+        self.values: List[Any] = []
+        self.expires: List[float] = []
+        self._lock = threading.Lock()
+    
+    def get(self, embedding) -> Optional[Any]:
+        """Return the cached value for a similar question, or None."""
+        query = np.asarray(embedding, dtype=np.float32).reshape(1, -1)
+        with self._lock:
+            if self.index.ntotal == 0:
+                return None
+            
+            scores, rows = self.index.search(query, min(self._CANDIDATES, self.index.ntotal))
+            now = time.time()
+            for score, row in zip(scores[0].tolist(), rows[0].tolist()):
+                if row == -1 or score < self.threshold:
+                    break
+                if self.expires[row] > now:
+                    return self.values[row]
+        return None
+    
+    def put(self, embedding, value: Any):
+        """Cache a value under a question embedding."""
+        vector = np.asarray(embedding, dtype=np.float32).reshape(1, -1)
+        with self._lock:
+            if self.index.ntotal >= self.max_entries:
+                self._evict()
+            
+            self.index.add(vector)
+            self.values.append(value)
+            self.expires.append(time.time() + self.ttl)
+    
+    def save(self, path: str):
+        """Persist the index and cached values so they survive a restart."""
+        with self._lock:
+            faiss.write_index(self.index, path)
+            with open(f"{path}.values", 'wb') as f:
+                pickle.dump({'values': self.values, 'expires': self.expires}, f)
+    
+    def load(self, path: str) -> bool:
+        """Load a cache written by ``save``; returns False if there is none."""
+        if not (os.path.exists(path) and os.path.exists(f"{path}.values")):
+            return False
+        
+        index = faiss.read_index(path)
+        with open(f"{path}.values", 'rb') as f:
+            data = pickle.load(f)
+        if index.d != self.dimension or index.ntotal != len(data['values']):
+            return False
+        
+        with self._lock:
+            self.index = index
+            self.values = data['values']
+            self.expires = data['expires']
+        return True
+    
+    def clear(self):
+        """Drop all entries."""
+        with self._lock:
+            self.index.reset()
+            self.values = []
+            self.expires = []
+    
+    def _evict(self):
+        """Rebuild the index without expired entries, keeping at most half when still full."""
+        now = time.time()
+        keep = [row for row, expires in enumerate(self.expires) if expires > now]
+        if len(keep) >= self.max_entries:
+            keep = keep[len(keep) - self.max_entries // 2:]
+        
+        vectors = self.index.reconstruct_n(0, self.index.ntotal)[keep]
+        self.index.reset()
+        self.index.add(vectors)
+        self.values = [self.values[row] for row in keep]
+        self.expires = [self.expires[row] for row in keep]
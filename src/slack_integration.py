@@ -1,14 +1,75 @@
+if __name__ == "__main__":
+    # Standalone runs are served by gunicorn gevent workers; patch before other imports
+    from gevent import monkey
+    monkey.patch_all()
+
 import os
+import hmac
+import time
+import hashlib
+import orjson
+from urllib.parse import parse_qs
 from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
+from slack_sdk.http_retry.builtin_handlers import (
+    ConnectionErrorRetryHandler,
+    RateLimitErrorRetryHandler,
+    ServerErrorRetryHandler
+)
+from slack_sdk.http_retry.builtin_interval_calculators import BackoffRetryIntervalCalculator
 from flask import Flask, request, jsonify
-from typing import Dict, Any
+from flask.json.provider import JSONProvider
+from typing import Dict, Any, Callable
+from concurrent.futures import ThreadPoolExecutor
 import threading
 import uuid
 
-from .rag_system import RAGSystem, ConversationManager
+from .rag_system import RAGSystem, ConversationManager, create_conversation_manager
 from config.settings import settings
 
+try:
+    from gunicorn.app.base import BaseApplication
+    GUNICORN_AVAILABLE = True
+except ImportError:
+    # gunicorn is not available on Windows
+    GUNICORN_AVAILABLE = False
+
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson."""
+    
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj).decode('utf-8')
+    
+    def loads(self, s, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+    
+    def response(self, *args: Any, **kwargs: Any):
+        # Write orjson's bytes straight into the response body
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj), mimetype="application/json")
+
+
+if GUNICORN_AVAILABLE:
+    class GunicornApp(BaseApplication):
+        """Serve a WSGI app from gunicorn without a config file.
+        
+        ``app_factory`` is called by ``load()`` in each worker after the fork,
+        so the threads and index handles it creates belong to that worker.
+        """
+        
+        def __init__(self, app_factory: Callable[[], Any], options: Dict[str, Any]):
+            self.app_factory = app_factory
+            self.options = options
+            super().__init__()
+        
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+        
+        def load(self):
+            return self.app_factory()
+
 
 class SlackBot:
     """Slack integration for the RAG chatbot."""
@@ -16,8 +77,26 @@ class SlackBot:
     def __init__(self, rag_system: RAGSystem, conversation_manager: ConversationManager):
         self.rag_system = rag_system
         self.conversation_manager = conversation_manager
-        self.client = WebClient(token=settings.slack_bot_token)
+        
+        # Retry dropped connections and 5xx with exponential backoff, and 429s
+        # after the Retry-After delay Slack sends
+        backoff = BackoffRetryIntervalCalculator(backoff_factor=0.5)
+        self.client = WebClient(
+            token=settings.slack_bot_token,
+            retry_handlers=[
+                ConnectionErrorRetryHandler(max_retry_count=5, interval_calculator=backoff),
+                ServerErrorRetryHandler(max_retry_count=5, interval_calculator=backoff),
+                RateLimitErrorRetryHandler(max_retry_count=5)
+            ]
+        )
+        
         self.app = Flask(__name__)
+        self.app.json = OrjsonProvider(self.app)
+        
+        # Events are acked immediately and answered in the background; the
+        # semaphore bounds queued plus running events
+        self.executor = ThreadPoolExecutor(max_workers=settings.thread_pool_size)
+        self._queue_slots = threading.BoundedSemaphore(settings.slack_queue_size)
         
         # Setup Flask routes
         self.setup_routes()
@@ -28,7 +107,11 @@ class SlackBot:
         @self.app.route('/slack/events', methods=['POST'])
         def slack_events():
             """Handle Slack events."""
-            data = request.json
+            # Read the body once; it is both signed and parsed
+            raw_body = request.get_data(cache=True)
+            if not self.verify_request(raw_body):
+                return '', 401
+            data = orjson.loads(raw_body)
             
             # Handle URL verification challenge
             if data.get('type') == 'url_verification':
@@ -39,18 +122,25 @@ class SlackBot:
                 event = data.get('event', {})
                 
                 if event.get('type') == 'message' and 'bot_id' not in event:
-                    # This is a user message, not from a bot
-                    self.handle_message(event)
+                    # This is a user message, not from a bot. Ack within Slack's
+                    # 3 second window; when the queue is full Slack will retry.
+                    if not self.submit_event(event):
+                        return '', 503
             
             return '', 200
         
         @self.app.route('/slack/commands', methods=['POST'])
         def slack_commands():
             """Handle Slack slash commands."""
-            command = request.form.get('command')
-            text = request.form.get('text', '')
-            user_id = request.form.get('user_id')
-            channel_id = request.form.get('channel_id')
+            raw_body = request.get_data(cache=True)
+            if not self.verify_request(raw_body):
+                return '', 401
+            
+            form = {key: values[0] for key, values in parse_qs(raw_body.decode('utf-8')).items()}
+            command = form.get('command')
+            text = form.get('text', '')
+            user_id = form.get('user_id')
+            channel_id = form.get('channel_id')
             
             if command == '/rag':
                 # Handle RAG query command
@@ -62,6 +152,33 @@ class SlackBot:
             
             return jsonify({'text': 'Unknown command'})
     
+    def verify_request(self, raw_body: bytes) -> bool:
+        """Check Slack's HMAC-SHA256 request signature (skipped when no signing secret is set)."""
+        if not settings.slack_signing_secret:
+            return True
+        
+        timestamp = request.headers.get('X-Slack-Request-Timestamp', '')
+        signature = request.headers.get('X-Slack-Signature', '')
+        
+        # Reject stale timestamps to prevent replays
+        if not timestamp.isdigit() or abs(time.time() - int(timestamp)) > 60 * 5:
+            return False
+        
+        expected = 'v0=' + hmac.new(
+            settings.slack_signing_secret.encode('utf-8'),
+            f"v0:{timestamp}:".encode('utf-8') + raw_body,
+            hashlib.sha256
+        ).hexdigest()
+        return hmac.compare_digest(expected, signature)
+    
+    def submit_event(self, event: Dict[str, Any]) -> bool:
+        """Queue an event for background handling; returns False if the queue is full."""
+        if not self._queue_slots.acquire(blocking=False):
+            return False
+        future = self.executor.submit(self.handle_message, event)
+        future.add_done_callback(lambda _: self._queue_slots.release())
+        return True
+    
     def handle_message(self, event: Dict[str, Any]):
         """Handle incoming Slack messages."""
         try:
@@ -78,8 +195,8 @@ class SlackBot:
             # Process the query
             response = self.handle_query(text, user_id, conversation_id)
             
-            # Send response back to Slack
-            self.send_message(channel_id, response)
+            # Post the reply from another worker so this one can take the next event
+            self.executor.submit(self.send_message, channel_id, response)
             
         except Exception as e:
             print(f"Error handling Slack message: {str(e)}")
@@ -88,29 +205,31 @@ class SlackBot:
         """Process a query and return response."""
         try:
             # Get conversation history
-            history = self.conversation_manager.get_conversation_history(conversation_id)
+            history = self.conversation_manager.get_conversation_history(
+                conversation_id,
+                limit=settings.rag_history_window
+            )
             
             # Add user message to history
             self.conversation_manager.add_message(conversation_id, "user", text)
             
-            # Query RAG system
-            rag_response = self.rag_system.query(text, history)
+            # Query RAG system; repeats are answered from the shared answer caches
+            rag_response = self.rag_system.cached_query(text, history)
             
             # Add assistant response to history
             self.conversation_manager.add_message(
                 conversation_id,
                 "assistant",
                 rag_response.answer,
-                {"sources": [s['id'] for s in rag_response.sources]}
+                {"sources": rag_response.source_ids}
             )
             
             # Format response with sources
             response = rag_response.answer
             if rag_response.sources:
-                sources_text = "\n\n*Sources:*\n"
-                for i, source in enumerate(rag_response.sources[:3]):  # Limit to top 3
-                    sources_text += f"• {source['filename']}\n"
-                response += sources_text
+                # Limit to top 3, listing each file once
+                filenames = dict.fromkeys(source['filename'] for source in rag_response.sources[:3])
+                response += "\n\n*Sources:*\n" + "".join(f"• {filename}\n" for filename in filenames)
             
             # Add confidence if available
             if rag_response.confidence > 0:
@@ -132,8 +251,34 @@ class SlackBot:
             print(f"Error sending Slack message: {e.response['error']}")
     
     def run(self, port: int = 3000):
-        """Run the Slack bot Flask app."""
-        self.app.run(host='0.0.0.0', port=port, debug=False)
+        """Run the Slack bot Flask app with Flask's threaded server (see ``serve_slack_bot``)."""
+        self.app.run(host='0.0.0.0', port=port, debug=False, threaded=True)
+
+
+def _build_slack_app() -> Flask:
+    """Build a Slack bot with its own RAG system and conversation manager and return its Flask app."""
+    return SlackBot(RAGSystem(), create_conversation_manager()).app
+
+
+def serve_slack_bot(port: int = 3000):
+    """Serve the Slack bot on its own.
+    
+    With gunicorn the app is served by gevent workers, so slow OpenAI and
+    Slack API calls do not hold up other events. Each worker builds its own
+    bot in ``GunicornApp.load()``. Workers cannot share a local FAISS index
+    or in-process conversation history, so there are 2 * CPUs + 1 of them
+    only with Pinecone and REDIS_URL and a single one otherwise.
+    """
+    if not GUNICORN_AVAILABLE:
+        _build_slack_app().run(host='0.0.0.0', port=port, debug=False, threaded=True)
+        return
+    
+    GunicornApp(_build_slack_app, {
+        'bind': f'0.0.0.0:{port}',
+        'worker_class': 'gevent',
+        'workers': 2 * (os.cpu_count() or 1) + 1 if settings.shared_state else 1,
+        'worker_connections': 1000
+    }).run()
 
 
 def start_slack_bot(rag_system: RAGSystem, conversation_manager: ConversationManager):
@@ -151,3 +296,8 @@ def start_slack_bot(rag_system: RAGSystem, conversation_manager: ConversationMan
     
     print("Slack bot started on port 3000")
     return bot
+
+
+if __name__ == "__main__":
+    # python -m src.slack_integration
+    serve_slack_bot()
@@ -0,0 +1,101 @@
+import zipfile
+from xml.etree import ElementTree
+from typing import Optional
+from pathlib import Path
+import pypdfium2 as pdfium
+from bs4 import BeautifulSoup
+
+# Plain text extraction only. process_documents runs this in spawned worker
+# processes, so it must not import the embedding model (torch) or httpx.
+
+# File suffixes extract_text_from_file can handle
+SUPPORTED_FILE_TYPES = frozenset({'.pdf', '.docx', '.doc', '.txt', '.md', '.html', '.htm'})
+
+# WordprocessingML tags used when reading DOCX files
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_PARAGRAPH = f"{_W_NS}p"
+_W_RUN = f"{_W_NS}r"
+_W_TEXT = f"{_W_NS}t"
+_W_TAB = f"{_W_NS}tab"
+_W_BREAKS = (f"{_W_NS}br", f"{_W_NS}cr")
+
+
+def extract_text_from_file(file_path: str, file_type: Optional[str] = None) -> str:
+    """Extract text from various file types."""
+    if not file_type:
+        file_type = Path(file_path).suffix.lower()
+    
+    try:
+        if file_type in ['.pdf']:
+            return _extract_from_pdf(file_path)
+        elif file_type in ['.docx', '.doc']:
+            return _extract_from_docx(file_path)
+        elif file_type in ['.txt', '.md']:
+            return _extract_from_text(file_path)
+        elif file_type in ['.html', '.htm']:
+            return _extract_from_html(file_path)
+        else:
+            raise ValueError(f"Unsupported file type: {file_type}")
+    except Exception as e:
+        raise Exception(f"Error extracting text from {file_path}: {str(e)}")
+
+
+def html_to_text(html) -> str:
+    """Strip markup from an HTML document."""
+    return BeautifulSoup(html, 'lxml').get_text().strip()
+
+
+def _extract_from_pdf(file_path: str) -> str:
+    """Extract text from PDF files."""
+    # PDFium is not thread-safe, so pages are extracted sequentially
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        parts = []
+        for page in pdf:
+            textpage = page.get_textpage()
+            parts.append(textpage.get_text_range())
+            textpage.close()
+            page.close()
+    finally:
+        pdf.close()
+    return "\n".join(parts).strip()
+
+
+def _extract_from_docx(file_path: str) -> str:
+    """Extract text from DOCX files."""
+    # Stream word/document.xml instead of building python-docx's object model
+    parts = []
+    runs = []
+    run_depth = 0
+    with zipfile.ZipFile(file_path) as archive, archive.open('word/document.xml') as document:
+        for event, element in ElementTree.iterparse(document, events=('start', 'end')):
+            tag = element.tag
+            if tag == _W_RUN:
+                run_depth += 1 if event == 'start' else -1
+            elif event != 'end':
+                continue
+            elif tag == _W_PARAGRAPH:
+                parts.append(''.join(runs))
+                runs = []
+                element.clear()
+            elif run_depth:
+                # Only text inside runs counts; w:tab also defines tab stops in paragraph properties
+                if tag == _W_TEXT:
+                    runs.append(element.text or '')
+                elif tag == _W_TAB:
+                    runs.append('\t')
+                elif tag in _W_BREAKS:
+                    runs.append('\n')
+    return "\n".join(parts).strip()
+
+
+def _extract_from_text(file_path: str) -> str:
+    """Extract text from plain text files."""
+    with open(file_path, 'r', encoding='utf-8') as file:
+        return file.read().strip()
+
+
+def _extract_from_html(file_path: str) -> str:
+    """Extract text from HTML files."""
+    with open(file_path, 'r', encoding='utf-8') as file:
+        return html_to_text(file.read())
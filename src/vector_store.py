@@ -1,12 +1,21 @@
 import os
+import glob
 import json
+import math
+import atexit
 import pickle
+import threading
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Set, Tuple
 import numpy as np
 import faiss
+import pyarrow as pa
+import pyarrow.ipc
+import pyarrow.compute as pc
 import chromadb
 from sentence_transformers import SentenceTransformer
+from .query_cache import QueryCache
 
 try:
     import pinecone
@@ -14,20 +23,59 @@ try:
 except ImportError:
     PINECONE_AVAILABLE = False
 
+# Micro-batched searches send 16+ queries at a time; score those with one BLAS GEMM
+faiss.cvar.distance_compute_blas_threshold = 16
+
 
 class VectorStore(ABC):
     """Abstract base class for vector stores."""
     
+    # Exact-repeat search cache; stores create it in __init__ and clear it when their contents change
+    query_cache: Optional[QueryCache] = None
+    
     @abstractmethod
     def add_documents(self, documents: List[Dict[str, Any]]) -> List[str]:
         """Add documents to the vector store."""
         pass
     
-    @abstractmethod
     def search(self, query_embedding: List[float], top_k: int = 3) -> List[Dict[str, Any]]:
-        """Search for similar documents."""
+        """Search for similar documents, answering exact repeats from the query cache."""
+        return self.search_batch([query_embedding], top_k)[0]
+    
+    def search_batch(self, query_embeddings: np.ndarray, top_k: int = 3) -> List[List[Dict[str, Any]]]:
+        """Search for several queries at once, one result list per query row.
+        
+        Rows found in the query cache are answered from it and the misses are
+        searched together. Results are shallow copies, so callers may mutate
+        them without corrupting the cache.
+        """
+        query_embeddings = np.asarray(query_embeddings, dtype=np.float32)
+        if self.query_cache is None:
+            return self._search_batch(query_embeddings, top_k)
+        
+        keys = [QueryCache.make_key(query_embedding, top_k) for query_embedding in query_embeddings]
+        results = [self.query_cache.get(key) for key in keys]
+        misses = [i for i, hits in enumerate(results) if hits is None]
+        if misses:
+            for i, hits in zip(misses, self._search_batch(query_embeddings[misses], top_k)):
+                self.query_cache.put(keys[i], hits)
+                results[i] = hits
+        return [[dict(hit) for hit in hits] for hits in results]
+    
+    @abstractmethod
+    def _search(self, query_embedding: List[float], top_k: int = 3) -> List[Dict[str, Any]]:
+        """Search the underlying index for similar documents."""
         pass
     
+    def _search_batch(self, query_embeddings: np.ndarray, top_k: int = 3) -> List[List[Dict[str, Any]]]:
+        """Search the underlying index for several queries (one ``_search`` per row by default)."""
+        return [self._search(query_embedding.tolist(), top_k) for query_embedding in query_embeddings]
+    
+    def _invalidate_query_cache(self):
+        """Forget cached search results after the store's contents changed."""
+        if self.query_cache is not None:
+            self.query_cache.clear()
+    
     @abstractmethod
     def delete_document(self, document_id: str) -> bool:
         """Delete a document from the vector store."""
@@ -37,127 +85,536 @@ class VectorStore(ABC):
     def get_document_count(self) -> int:
         """Get the total number of documents in the store."""
         pass
+    
+    def has_document(self, filename: str) -> bool:
+        """Return True if chunks of ``filename`` are stored (False when the store cannot tell)."""
+        return False
+    
+    def flush(self):
+        """Persist pending changes (no-op for stores that write through)."""
+        pass
+    
+    def add_documents_bulk(self, documents: List[Dict[str, Any]]) -> List[str]:
+        """Add documents and persist them before returning."""
+        doc_ids = self.add_documents(documents)
+        self.flush()
+        return doc_ids
+
+
+# Row metadata for FAISSVectorStore, stored as Arrow IPC segments
+_METADATA_SCHEMA = pa.schema([
+    ('id', pa.string()),
+    ('text', pa.string()),
+    ('filename', pa.string()),
+    ('file_type', pa.string()),
+    ('chunk_id', pa.int64()),
+    ('token_count', pa.int64()),
+    ('metadata', pa.string())
+])
 
 
 class FAISSVectorStore(VectorStore):
-    """FAISS-based vector store for local deployment."""
+    """FAISS-based vector store for local deployment.
+    
+    Embeddings are expected to be L2-normalized (DocumentProcessor and
+    RAGSystem produce unit vectors), so inner product equals cosine
+    similarity and no normalization happens here. Callers with raw vectors
+    can pass ``normalize_embeddings=True`` to normalize on add and search.
+    
+    ``index_type`` selects "flat" (exact search), "ivfpq" or "hnsw". The
+    approximate indexes only pay off on larger corpora, so the store keeps
+    an exact flat index until ``flat_threshold`` vectors have been added and
+    then rebuilds it as the requested type. HNSW graphs use ``hnsw_m``
+    links per node and the ``ef_construction``/``ef_search`` beam widths;
+    smaller values build and search faster at some cost in recall.
+    
+    ``quantization`` stores the flat index's vectors as "fp16" or "int8"
+    scalar codes instead of float32, halving or quartering its memory and
+    scan bandwidth. int8 codes need per-dimension ranges calibrated on real
+    data, so an int8 store keeps float32 vectors until ``quantize_threshold``
+    have been added and then trains the quantizer on all of them.
+    
+    With ``use_gpu`` and a GPU build of FAISS, flat and IVF-PQ indexes are
+    searched on GPU 0 (HNSW and scalar-quantized flat indexes have no GPU
+    implementation and stay on CPU). The index is copied back to CPU to be
+    written to disk.
+    
+    Row metadata lives in append-only Arrow IPC segment files next to the
+    index, which are memory-mapped on load. Deleted rows are recorded in an
+    append-only tombstone file instead of rewriting the metadata.
+    
+    Adds and deletes only mark the store dirty; ``flush()`` writes new
+    metadata, the index and tombstones, in that order. A background timer flushes at most
+    every ``flush_interval`` seconds, and pending changes are flushed at exit.
+    
+    With ``read_only`` (see ``load_mmap``) adds, deletes and flushes raise
+    ``RuntimeError``. IVF indexes are opened with ``IO_FLAG_MMAP`` so their
+    inverted lists are demand-paged from disk; FAISS cannot map flat,
+    scalar-quantized or HNSW indexes, which are still read into memory.
+    """
     
-    def __init__(self, dimension: int = 384, index_file: str = "faiss_index.bin"):
+    INDEX_TYPES = ("flat", "ivfpq", "hnsw")
+    QUANTIZERS = {
+        "fp16": faiss.ScalarQuantizer.QT_fp16,
+        "int8": faiss.ScalarQuantizer.QT_8bit
+    }
+    
+    def __init__(self, dimension: int = 384, index_file: str = "faiss_index.bin",
+                 index_type: str = "flat", flat_threshold: int = 10000, normalize_embeddings: bool = False,
+                 flush_interval: Optional[float] = 5.0, quantization: Optional[str] = None,
+                 use_gpu: bool = False, query_cache_size: int = 2000, read_only: bool = False,
+                 hnsw_m: int = 32, ef_construction: int = 200, ef_search: int = 64,
+                 quantize_threshold: int = 1000):
+        if index_type not in self.INDEX_TYPES:
+            raise ValueError(f"Unsupported FAISS index type: {index_type}")
+        if quantization is not None and quantization not in self.QUANTIZERS:
+            raise ValueError(f"Unsupported FAISS quantization: {quantization}")
+        
         self.dimension = dimension
         self.index_file = index_file
-        self.metadata_file = f"{index_file}.metadata"
+        self.query_cache = QueryCache(max_size=query_cache_size) if query_cache_size else None
+        self.metadata_dir = f"{index_file}.meta"
+        self.tombstone_file = os.path.join(self.metadata_dir, "deleted.bin")
+        self.legacy_metadata_file = f"{index_file}.metadata"
+        self.index_type = index_type
+        self.flat_threshold = flat_threshold
+        self.normalize_embeddings = normalize_embeddings
+        self.quantization = quantization
+        self.quantize_threshold = quantize_threshold
+        self.read_only = read_only
+        
+        # Search-time parameters for the approximate indexes
+        self.nprobe = 16
+        self.hnsw_m = hnsw_m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        
+        # GPU resources are only allocated when a GPU is actually used
+        self._gpu_resources = None
+        self._on_gpu = False
+        if use_gpu and hasattr(faiss, "StandardGpuResources") and faiss.get_num_gpus() > 0:
+            self._gpu_resources = faiss.StandardGpuResources()
         
         # Initialize FAISS index
-        self.index = faiss.IndexFlatIP(dimension)  # Inner product for cosine similarity
-        self.documents = {}
-        self.id_counter = 0
+        self.index = self._create_flat_index()
+        self._approximate = False
+        self._quantized = quantization == "fp16"
+        
+        # Row i of the metadata table describes FAISS vector i
+        self.table = _METADATA_SCHEMA.empty_table()
+        self.deleted: Set[int] = set()
+        self.segment_count = 0
+        self._id_to_row: Optional[Dict[str, int]] = None
+        
+        # Changes not yet written to disk
+        self.flush_interval = flush_interval
+        self._dirty = False
+        self._pending_rows: List[pa.Table] = []
+        self._pending_deletes: List[int] = []
+        self._flush_timer: Optional[threading.Timer] = None
+        self._lock = threading.RLock()
         
         # Load existing index if available
         self.load_index()
+        self.index = self._to_device(self.index)
+        atexit.register(self.flush)
+    
+    @classmethod
+    def load_mmap(cls, index_file: str, **kwargs) -> "FAISSVectorStore":
+        """Open a persisted store read-only with its index memory-mapped."""
+        return cls(index_file=index_file, read_only=True, **kwargs)
+    
+    def _check_writable(self):
+        """Raise if the store was opened read-only."""
+        if self.read_only:
+            raise RuntimeError(f"FAISS store {self.index_file} is opened read-only")
     
     def add_documents(self, documents: List[Dict[str, Any]]) -> List[str]:
         """Add documents to FAISS index."""
-        embeddings = []
-        doc_ids = []
+        self._check_writable()
+        # Preallocate the matrix handed to index.add and fill it per document in place
+        total_chunks = sum(len(doc['chunks']['texts']) for doc in documents)
+        embeddings_array = np.empty((total_chunks, self.dimension), dtype=np.float32)
+        offset = 0
+        tables = []
+        row = self.table.num_rows
         
         for doc in documents:
-            for chunk in doc['chunks']:
-                doc_id = f"{doc['filename']}_{chunk['id']}_{self.id_counter}"
-                self.id_counter += 1
-                
-                # Normalize embedding for cosine similarity
-                embedding = np.array(chunk['embedding'], dtype=np.float32)
-                embedding = embedding / np.linalg.norm(embedding)
-                
-                embeddings.append(embedding)
-                doc_ids.append(doc_id)
-                
-                self.documents[doc_id] = {
-                    'text': chunk['text'],
-                    'filename': doc['filename'],
-                    'file_type': doc['file_type'],
-                    'chunk_id': chunk['id'],
-                    'metadata': doc.get('metadata', {})
-                }
+            chunks = doc['chunks']
+            num_chunks = len(chunks['texts'])
+            embeddings_array[offset:offset + num_chunks] = chunks['embeddings']
+            offset += num_chunks
+            
+            ids = [f"{doc['filename']}_{chunk_id}_{row + i}" for i, chunk_id in enumerate(chunks['ids'].tolist())]
+            row += num_chunks
+            
+            tables.append(pa.Table.from_pydict({
+                'id': ids,
+                'text': chunks['texts'],
+                'filename': [doc['filename']] * num_chunks,
+                'file_type': [doc['file_type']] * num_chunks,
+                'chunk_id': chunks['ids'],
+                'token_count': chunks['token_counts'],
+                'metadata': [json.dumps(doc.get('metadata', {}))] * num_chunks
+            }, schema=_METADATA_SCHEMA))
         
-        # Add to FAISS index
-        embeddings_array = np.vstack(embeddings)
-        self.index.add(embeddings_array)
+        # Add to FAISS index as one contiguous float32 matrix; it is our own buffer, so normalize in place
+        if self.normalize_embeddings:
+            faiss.normalize_L2(embeddings_array)
+        new_rows = pa.concat_tables(tables)
         
-        # Save index
-        self.save_index()
+        with self._lock:
+            if not self.index.is_trained:
+                self.index.train(embeddings_array)
+            self.index.add(embeddings_array)
+            self._maybe_rebuild_index()
+            self._maybe_quantize_index()
+            self._append_rows(new_rows)
+            self._mark_dirty()
+        self._invalidate_query_cache()
         
-        return doc_ids
+        return new_rows['id'].to_pylist()
     
-    def search(self, query_embedding: List[float], top_k: int = 3) -> List[Dict[str, Any]]:
+    def _append_rows(self, rows: pa.Table):
+        """Add rows to the metadata table; they are written out on the next flush."""
+        if self._id_to_row is not None:
+            start = self.table.num_rows
+            self._id_to_row.update((doc_id, start + i) for i, doc_id in enumerate(rows['id'].to_pylist()))
+        self.table = pa.concat_tables([self.table, rows])
+        self._pending_rows.append(rows)
+    
+    def _mark_dirty(self):
+        """Schedule a flush if none is pending."""
+        self._dirty = True
+        if self.flush_interval is not None and self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.flush_interval, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+    
+    def flush(self):
+        """Write new metadata segments, the index and tombstones if anything changed.
+        
+        Metadata goes first: rows without vectors are dropped on load, while
+        vectors without metadata rows could not be searched.
+        """
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._dirty:
+                return
+            self._check_writable()
+            os.makedirs(self.metadata_dir, exist_ok=True)
+            
+            # All rows added since the last flush go into one new segment
+            if self._pending_rows:
+                path = os.path.join(self.metadata_dir, f"segment-{self.segment_count:06d}.arrow")
+                self._write_segment(path, pa.concat_tables(self._pending_rows))
+                self.segment_count += 1
+                self._pending_rows = []
+            
+            self.save_index()
+            
+            # Tombstones name rows, so they are only written once the index holds those rows
+            if self._pending_deletes:
+                with open(self.tombstone_file, 'ab') as f:
+                    f.write(np.asarray(self._pending_deletes, dtype=np.int64).tobytes())
+                self._pending_deletes = []
+            
+            self._dirty = False
+    
+    @property
+    def id_to_row(self) -> Dict[str, int]:
+        """Map live document ids to rows; built on first use to keep startup cheap."""
+        if self._id_to_row is None:
+            self._id_to_row = {
+                doc_id: row for row, doc_id in enumerate(self.table['id'].to_pylist()) if row not in self.deleted
+            }
+        return self._id_to_row
+    
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        """Return a row-wise L2-normalized copy of an (n, d) matrix."""
+        # faiss.normalize_L2 works in place with SIMD, on a C-contiguous float32 copy
+        normalized = np.array(matrix, dtype=np.float32, order='C', copy=True)
+        faiss.normalize_L2(normalized)
+        return normalized
+    
+    def _create_flat_index(self):
+        """Create the exact-search index (fp16 storage needs no training, int8 starts as float32)."""
+        if self.quantization == "fp16":
+            return self._create_quantized_index()
+        return faiss.IndexFlatIP(self.dimension)  # Inner product for cosine similarity
+    
+    def _create_quantized_index(self):
+        """Create an empty scalar-quantized flat index."""
+        return faiss.IndexScalarQuantizer(self.dimension, self.QUANTIZERS[self.quantization],
+                                          faiss.METRIC_INNER_PRODUCT)
+    
+    def _maybe_quantize_index(self):
+        """Switch the float32 flat index to int8 once there are enough vectors to train its ranges."""
+        if self.quantization is None or self._quantized or self._approximate:
+            return
+        if self.index.ntotal < self.quantize_threshold:
+            return
+        
+        # Train on everything stored so later documents are not clipped to one batch's ranges
+        vectors = self.index.reconstruct_n(0, self.index.ntotal)
+        index = self._create_quantized_index()
+        index.train(vectors)
+        index.add(vectors)
+        self.index = self._to_device(index)
+        self._quantized = True
+    
+    def _maybe_rebuild_index(self):
+        """Switch from the flat index to the configured type once it is large enough."""
+        if self.index_type == "flat" or self._approximate:
+            return
+        if self.index.ntotal < self.flat_threshold:
+            return
+        
+        # Rebuild from the stored vectors, keeping row order (and thus ids)
+        vectors = self.index.reconstruct_n(0, self.index.ntotal)
+        self.index = self._to_device(self._build_index(vectors))
+        self._approximate = True
+    
+    def _build_index(self, vectors: np.ndarray):
+        """Build and fill an index of the configured type."""
+        if self.index_type == "ivfpq":
+            nlist = int(4 * math.sqrt(len(vectors)))
+            quantizer = faiss.IndexFlatIP(self.dimension)
+            # d/M = 8 keeps PQ on FAISS's specialised sub-quantizer kernels (M=48 for 384-d)
+            index = faiss.IndexIVFPQ(quantizer, self.dimension, nlist, self.dimension // 8, 8,
+                                     faiss.METRIC_INNER_PRODUCT)
+            index.train(vectors)
+        else:
+            index = faiss.IndexHNSWFlat(self.dimension, self.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = self.ef_construction
+        
+        index.add(vectors)
+        self._set_search_params(index)
+        return index
+    
+    def _to_device(self, index):
+        """Move a CPU index to the GPU when one is configured and supports it."""
+        self._on_gpu = False
+        if self._gpu_resources is None or not isinstance(index, (faiss.IndexFlat, faiss.IndexIVF)):
+            return index
+        
+        # fp16 lookup tables let IVF-PQ use many sub-quantizers within GPU shared memory
+        options = faiss.GpuClonerOptions()
+        options.useFloat16 = True
+        self._on_gpu = True
+        return faiss.index_cpu_to_gpu(self._gpu_resources, 0, index, options)
+    
+    def _set_search_params(self, index):
+        """Apply search-time parameters to an approximate index."""
+        if isinstance(index, faiss.IndexIVF):
+            index.nprobe = self.nprobe
+        elif isinstance(index, faiss.IndexHNSW):
+            index.hnsw.efSearch = self.ef_search
+    
+    def _search(self, query_embedding: List[float], top_k: int = 3) -> List[Dict[str, Any]]:
         """Search for similar documents using FAISS."""
-        if self.index.ntotal == 0:
+        return self._search_batch(np.asarray(query_embedding, dtype=np.float32).reshape(1, -1), top_k)[0]
+    
+    def _search_batch(self, query_embeddings: np.ndarray, top_k: int = 3) -> List[List[Dict[str, Any]]]:
+        """Search for several queries with one FAISS call.
+        
+        For flat indexes FAISS switches from per-query dot products to a BLAS
+        matrix multiply once the batch reaches
+        ``faiss.cvar.distance_compute_blas_threshold`` queries (20 by default).
+        
+        The search runs under the store's lock: FAISS may reallocate its
+        storage during a concurrent ``add``, and the metadata table and
+        tombstones must match the index that was searched.
+        """
+        query_embeddings = np.ascontiguousarray(query_embeddings, dtype=np.float32).reshape(-1, self.dimension)
+        if len(query_embeddings) == 0:
             return []
+        if self.normalize_embeddings:
+            query_embeddings = self._normalize(query_embeddings)
         
-        # Normalize query embedding
-        query_embedding = np.array(query_embedding, dtype=np.float32)
-        query_embedding = query_embedding / np.linalg.norm(query_embedding)
-        query_embedding = query_embedding.reshape(1, -1)
+        with self._lock:
+            if self.index.ntotal == 0:
+                return [[] for _ in range(len(query_embeddings))]
+            
+            # Search, over-fetching so deleted rows can be skipped
+            k = min(top_k + len(self.deleted), self.index.ntotal)
+            scores, indices = self.index.search(query_embeddings, k)
+            table = self.table
+            deleted = np.fromiter(self.deleted, dtype=np.int64, count=len(self.deleted))
         
-        # Search
-        scores, indices = self.index.search(query_embedding, min(top_k, self.index.ntotal))
+        # Mask padding (-1), tombstoned rows and rows without metadata with array ops
+        valid = (indices >= 0) & (indices < table.num_rows)
+        if len(deleted):
+            valid &= ~np.isin(indices, deleted)
         
-        results = []
-        doc_ids = list(self.documents.keys())
+        # Keep each query's top_k surviving hits and gather all their metadata with one take
+        hits = [np.flatnonzero(query_valid)[:top_k] for query_valid in valid]
+        rows = np.concatenate([indices[q, cols] for q, cols in enumerate(hits)])
+        records = table.take(rows).to_pylist()
         
-        for i, idx in enumerate(indices[0]):
-            if idx != -1:  # Valid result
-                doc_id = doc_ids[idx]
-                doc = self.documents[doc_id]
-                results.append({
-                    'id': doc_id,
-                    'text': doc['text'],
-                    'filename': doc['filename'],
-                    'file_type': doc['file_type'],
-                    'score': float(scores[0][i]),
-                    'metadata': doc['metadata']
-                })
+        results = []
+        offset = 0
+        for q, cols in enumerate(hits):
+            query_results = records[offset:offset + len(cols)]
+            offset += len(cols)
+            for record, score in zip(query_results, scores[q, cols].tolist()):
+                record['metadata'] = json.loads(record['metadata'])
+                record['score'] = score
+            results.append(query_results)
         
         return results
     
     def delete_document(self, document_id: str) -> bool:
-        """Delete a document (not efficiently supported in FAISS)."""
-        if document_id in self.documents:
-            del self.documents[document_id]
-            self.save_index()
-            return True
-        return False
+        """Delete a document by tombstoning its row (FAISS rows cannot be removed in place)."""
+        self._check_writable()
+        with self._lock:
+            row = self.id_to_row.pop(document_id, None)
+            if row is None:
+                return False
+            self.deleted.add(row)
+            self._pending_deletes.append(row)
+            self._mark_dirty()
+        self._invalidate_query_cache()
+        return True
     
     def get_document_count(self) -> int:
         """Get the total number of documents."""
-        return len(self.documents)
+        return self.table.num_rows - len(self.deleted)
+    
+    def has_document(self, filename: str) -> bool:
+        """Return True if live chunks of ``filename`` are stored."""
+        rows = np.flatnonzero(pc.equal(self.table['filename'], filename).to_numpy())
+        return any(int(row) not in self.deleted for row in rows)
+    
+    @staticmethod
+    def _write_segment(path: str, table: pa.Table):
+        """Write an Arrow IPC metadata segment, replacing any existing file atomically."""
+        tmp_path = f"{path}.tmp"
+        with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, _METADATA_SCHEMA) as writer:
+            writer.write_table(table)
+        os.replace(tmp_path, path)
     
     def save_index(self):
-        """Save FAISS index and metadata to disk."""
-        faiss.write_index(self.index, self.index_file)
-        with open(self.metadata_file, 'wb') as f:
-            pickle.dump({
-                'documents': self.documents,
-                'id_counter': self.id_counter
-            }, f)
+        """Save the FAISS index to disk (metadata is written by ``flush``)."""
+        index = faiss.index_gpu_to_cpu(self.index) if self._on_gpu else self.index
+        faiss.write_index(index, self.index_file)
     
     def load_index(self):
         """Load FAISS index and metadata from disk."""
         if os.path.exists(self.index_file):
-            self.index = faiss.read_index(self.index_file)
+            # FAISS only memory-maps IVF inverted lists; other index types are read into memory
+            io_flags = 0
+            if self.read_only and self._is_ivf_file():
+                io_flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+            self.index = faiss.read_index(self.index_file, io_flags)
+            self._approximate = isinstance(self.index, (faiss.IndexIVF, faiss.IndexHNSW))
+            self._quantized = isinstance(self.index, faiss.IndexScalarQuantizer)
+            self._set_search_params(self.index)
+        
+        segments = sorted(glob.glob(os.path.join(self.metadata_dir, "segment-*.arrow")))
+        if segments:
+            # Memory-mapped reads are zero-copy; text is paged in as it is accessed
+            tables = [pa.ipc.open_file(pa.memory_map(path)).read_all() for path in segments]
+            if sum(table.num_rows for table in tables) != self.index.ntotal:
+                tables = self._truncate_segments(segments, tables)
+            self.table = pa.concat_tables(tables)
+            self.segment_count = len(tables)
+            
+            if os.path.exists(self.tombstone_file):
+                self.deleted = set(np.fromfile(self.tombstone_file, dtype=np.int64).tolist())
+        elif os.path.exists(self.legacy_metadata_file):
+            self._migrate_pickle()
+    
+    def _truncate_segments(self, segments: List[str], tables: List[pa.Table]) -> List[pa.Table]:
+        """Drop metadata rows past the last indexed vector.
+        
+        A flush interrupted after writing a segment but before the index
+        leaves such rows behind. Unless read-only, the segment files are cut
+        back too so later segments line up with the index again.
+        """
+        ntotal = self.index.ntotal
+        num_rows = sum(table.num_rows for table in tables)
+        if num_rows < ntotal:
+            raise RuntimeError(
+                f"FAISS index {self.index_file} has {ntotal} vectors but only {num_rows} metadata rows"
+            )
         
-        if os.path.exists(self.metadata_file):
-            with open(self.metadata_file, 'rb') as f:
-                data = pickle.load(f)
-                self.documents = data.get('documents', {})
-                self.id_counter = data.get('id_counter', 0)
+        kept = []
+        remaining = ntotal
+        for path, table in zip(segments, tables):
+            if table.num_rows <= remaining:
+                kept.append(table)
+                remaining -= table.num_rows
+                continue
+            if remaining:
+                kept.append(table.slice(0, remaining))
+            if not self.read_only:
+                if remaining:
+                    self._write_segment(path, kept[-1])
+                else:
+                    os.remove(path)
+            remaining = 0
+        return kept
+    
+    def _is_ivf_file(self) -> bool:
+        """Return True if the persisted index is an IVF index (FAISS fourccs "Iv**" and "Iw**")."""
+        with open(self.index_file, 'rb') as f:
+            return f.read(2) in (b"Iv", b"Iw")
+    
+    def _migrate_pickle(self):
+        """Convert metadata pickled by older versions into an Arrow segment."""
+        self._check_writable()
+        with open(self.legacy_metadata_file, 'rb') as f:
+            data = pickle.load(f)
+        
+        if 'documents' in data:
+            # Dict of per-chunk dicts in row order
+            docs = list(data['documents'].items())
+            columns = {
+                'id': [doc_id for doc_id, _ in docs],
+                'text': [doc['text'] for _, doc in docs],
+                'filename': [doc['filename'] for _, doc in docs],
+                'file_type': [doc['file_type'] for _, doc in docs],
+                'chunk_id': [doc['chunk_id'] for _, doc in docs],
+                'token_count': [doc.get('token_count') for _, doc in docs],
+                'metadata': [json.dumps(doc['metadata']) for _, doc in docs]
+            }
+            deleted = []
+        else:
+            # Row-aligned column lists
+            columns = {
+                'id': data['id_list'],
+                'text': data['texts'],
+                'filename': data['filenames'],
+                'file_type': data['file_types'],
+                'chunk_id': data['chunk_ids'],
+                'token_count': data['token_counts'],
+                'metadata': [json.dumps(metadata) for metadata in data['metadatas']]
+            }
+            deleted = sorted(data['deleted'])
+        
+        self._append_rows(pa.Table.from_pydict(columns, schema=_METADATA_SCHEMA))
+        self.deleted.update(deleted)
+        self._pending_deletes.extend(deleted)
+        self._dirty = True
+        self.flush()
+        os.remove(self.legacy_metadata_file)
 
 
 class ChromaDBVectorStore(VectorStore):
     """ChromaDB-based vector store."""
     
-    def __init__(self, collection_name: str = "documents", persist_directory: str = "./chroma_db"):
+    # Chunks per collection.add call; batches are sent concurrently
+    ADD_BATCH_SIZE = 1000
+    
+    def __init__(self, collection_name: str = "documents", persist_directory: str = "./chroma_db",
+                 max_workers: int = 8, query_cache_size: int = 2000):
         self.collection_name = collection_name
+        self.max_workers = max_workers
+        self.query_cache = QueryCache(max_size=query_cache_size) if query_cache_size else None
         self.client = chromadb.PersistentClient(path=persist_directory)
         self.collection = self.client.get_or_create_collection(
             name=collection_name,
@@ -172,52 +629,68 @@ class ChromaDBVectorStore(VectorStore):
         metadatas = []
         
         for doc in documents:
-            for chunk in doc['chunks']:
-                doc_id = f"{doc['filename']}_{chunk['id']}"
-                doc_ids.append(doc_id)
-                embeddings.append(chunk['embedding'])
-                texts.append(chunk['text'])
+            chunks = doc['chunks']
+            embeddings.append(chunks['embeddings'])
+            texts.extend(chunks['texts'])
+            
+            for chunk_id, token_count in zip(chunks['ids'].tolist(), chunks['token_counts'].tolist()):
+                doc_ids.append(f"{doc['filename']}_{chunk_id}")
                 metadatas.append({
                     'filename': doc['filename'],
                     'file_type': doc['file_type'],
-                    'chunk_id': chunk['id'],
+                    'chunk_id': chunk_id,
+                    'token_count': token_count,
                     **doc.get('metadata', {})
                 })
         
-        self.collection.add(
-            documents=texts,
-            embeddings=embeddings,
-            metadatas=metadatas,
-            ids=doc_ids
-        )
+        embeddings = np.concatenate(embeddings).astype(np.float32, copy=False)
+        
+        def add_batch(start: int):
+            end = start + self.ADD_BATCH_SIZE
+            self.collection.add(
+                documents=texts[start:end],
+                embeddings=embeddings[start:end].tolist(),
+                metadatas=metadatas[start:end],
+                ids=doc_ids[start:end]
+            )
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # list() re-raises the first failed batch
+            list(executor.map(add_batch, range(0, len(doc_ids), self.ADD_BATCH_SIZE)))
+        self._invalidate_query_cache()
         
         return doc_ids
     
-    def search(self, query_embedding: List[float], top_k: int = 3) -> List[Dict[str, Any]]:
+    def _search(self, query_embedding: List[float], top_k: int = 3) -> List[Dict[str, Any]]:
         """Search for similar documents using ChromaDB."""
         results = self.collection.query(
             query_embeddings=[query_embedding],
             n_results=top_k
         )
         
-        search_results = []
-        if results['documents']:
-            for i in range(len(results['documents'][0])):
-                search_results.append({
-                    'id': results['ids'][0][i],
-                    'text': results['documents'][0][i],
-                    'filename': results['metadatas'][0][i]['filename'],
-                    'file_type': results['metadatas'][0][i]['file_type'],
-                    'score': 1 - results['distances'][0][i],  # Convert distance to similarity
-                    'metadata': results['metadatas'][0][i]
-                })
+        if not results['documents']:
+            return []
         
-        return search_results
+        ids, texts = results['ids'][0], results['documents'][0]
+        metadatas, distances = results['metadatas'][0], results['distances'][0]
+        return [
+            {
+                'id': doc_id,
+                'text': text,
+                'filename': metadata['filename'],
+                'file_type': metadata['file_type'],
+                'score': 1 - distance,  # Convert distance to similarity
+                'token_count': metadata.get('token_count'),
+                'metadata': metadata
+            }
+            for doc_id, text, metadata, distance in zip(ids, texts, metadatas, distances)
+        ]
     
     def delete_document(self, document_id: str) -> bool:
         """Delete a document from ChromaDB."""
         try:
             self.collection.delete(ids=[document_id])
+            self._invalidate_query_cache()
             return True
         except Exception:
             return False
@@ -225,16 +698,24 @@ class ChromaDBVectorStore(VectorStore):
     def get_document_count(self) -> int:
         """Get the total number of documents."""
         return self.collection.count()
+    
+    def has_document(self, filename: str) -> bool:
+        """Return True if chunks of ``filename`` are stored."""
+        return bool(self.collection.get(where={"filename": filename}, limit=1, include=[])['ids'])
 
 
 class PineconeVectorStore(VectorStore):
     """Pinecone-based vector store."""
     
-    def __init__(self, api_key: str, environment: str, index_name: str = "documents"):
+    UPSERT_BATCH_SIZE = 100
+    
+    def __init__(self, api_key: str, environment: str, index_name: str = "documents", pool_threads: int = 8,
+                 query_cache_size: int = 2000):
         if not PINECONE_AVAILABLE:
             raise ImportError("Pinecone is not installed. Install with: pip install pinecone-client")
         
         self.index_name = index_name
+        self.query_cache = QueryCache(max_size=query_cache_size) if query_cache_size else None
         pinecone.init(api_key=api_key, environment=environment)
         
         # Create index if it doesn't exist
@@ -245,7 +726,8 @@ class PineconeVectorStore(VectorStore):
                 metric="cosine"
             )
         
-        self.index = pinecone.Index(index_name)
+        # pool_threads backs the async_req upserts in add_documents
+        self.index = pinecone.Index(index_name, pool_threads=pool_threads)
     
     def add_documents(self, documents: List[Dict[str, Any]]) -> List[str]:
         """Add documents to Pinecone."""
@@ -253,31 +735,40 @@ class PineconeVectorStore(VectorStore):
         doc_ids = []
         
         for doc in documents:
-            for chunk in doc['chunks']:
-                doc_id = f"{doc['filename']}_{chunk['id']}"
+            chunks = doc['chunks']
+            embeddings = np.asarray(chunks['embeddings'], dtype=np.float32).tolist()
+            
+            for chunk_id, text, token_count, embedding in zip(
+                chunks['ids'].tolist(), chunks['texts'], chunks['token_counts'].tolist(), embeddings
+            ):
+                doc_id = f"{doc['filename']}_{chunk_id}"
                 doc_ids.append(doc_id)
                 
                 vectors.append({
                     'id': doc_id,
-                    'values': chunk['embedding'],
+                    'values': embedding,
                     'metadata': {
-                        'text': chunk['text'],
+                        'text': text,
                         'filename': doc['filename'],
                         'file_type': doc['file_type'],
-                        'chunk_id': chunk['id'],
+                        'chunk_id': chunk_id,
+                        'token_count': token_count,
                         **doc.get('metadata', {})
                     }
                 })
         
-        # Upsert in batches
-        batch_size = 100
-        for i in range(0, len(vectors), batch_size):
-            batch = vectors[i:i+batch_size]
-            self.index.upsert(vectors=batch)
+        # Upsert batches concurrently, then wait for all of them
+        pending = [
+            self.index.upsert(vectors=vectors[i:i + self.UPSERT_BATCH_SIZE], async_req=True)
+            for i in range(0, len(vectors), self.UPSERT_BATCH_SIZE)
+        ]
+        for result in pending:
+            result.get()
+        self._invalidate_query_cache()
         
         return doc_ids
     
-    def search(self, query_embedding: List[float], top_k: int = 3) -> List[Dict[str, Any]]:
+    def _search(self, query_embedding: List[float], top_k: int = 3) -> List[Dict[str, Any]]:
         """Search for similar documents using Pinecone."""
         results = self.index.query(
             vector=query_embedding,
@@ -293,6 +784,7 @@ class PineconeVectorStore(VectorStore):
                 'filename': match.metadata['filename'],
                 'file_type': match.metadata['file_type'],
                 'score': match.score,
+                'token_count': match.metadata.get('token_count'),
                 'metadata': match.metadata
             })
         
@@ -302,6 +794,7 @@ class PineconeVectorStore(VectorStore):
         """Delete a document from Pinecone."""
         try:
             self.index.delete(ids=[document_id])
+            self._invalidate_query_cache()
             return True
         except Exception:
             return False
@@ -1,22 +1,87 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, Form
+from fastapi import FastAPI, File, UploadFile, HTTPException, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, FileResponse
-from pydantic import BaseModel
+from fastapi.responses import HTMLResponse, FileResponse, StreamingResponse, ORJSONResponse
+from pydantic import BaseModel, Field
+from async_lru import alru_cache
+from slowapi import Limiter, _rate_limit_exceeded_handler
+from slowapi.errors import RateLimitExceeded
+from slowapi.util import get_remote_address
 from typing import List, Optional, Dict, Any
 import os
 import uuid
+import asyncio
 import tempfile
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from pathlib import Path
 
-from .rag_system import RAGSystem, ConversationManager
+from .document_processor import DocumentProcessor
+from .rag_system import (
+    RAGSystem, create_conversation_manager, create_async_conversation_manager, is_smalltalk
+)
+from .whatsapp_integration import WhatsAppBot, router as whatsapp_router
 from config.settings import settings
 
+# RAG system is created in the lifespan handler so each worker process
+# loads the embedding model and vector index exactly once; src/main.py
+# sets it beforehand to share its own when serving in-process
+rag_system: Optional[RAGSystem] = None
+conversation_manager = create_conversation_manager()  # Blocking; used from WhatsApp's executor threads
+conversations = None  # Awaitable view of the same history for request handlers, set in lifespan
+
+STATIC_DIR = Path(__file__).parent / "static"
+UPLOAD_CHUNK_SIZE = 1 << 16
+
+# Parsing, chunking and embedding run in worker threads; bound how many at once
+ingest_semaphore = asyncio.Semaphore(settings.max_concurrent_ingests)
+
+# Introspection endpoints are rate limited per client address
+limiter = Limiter(key_func=get_remote_address)
+
+
+async def _run_blocking(fn, *args, **kwargs):
+    """Run a blocking RAG call on the app's RAG executor without blocking the event loop."""
+    return await asyncio.get_running_loop().run_in_executor(app.state.rag_executor, functools.partial(fn, *args, **kwargs))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize the RAG system when the worker starts and save the answer cache on shutdown."""
+    global rag_system, conversations
+    if rag_system is None:
+        rag_system = RAGSystem()
+    conversations = create_async_conversation_manager(conversation_manager)
+    if settings.semantic_cache_path:
+        rag_system.semantic_cache.load(settings.semantic_cache_path)
+    app.state.whatsapp_bot = WhatsAppBot(rag_system, conversation_manager)
+    # Blocking RAG calls get their own pool, sized for CPU-bound embedding work
+    # rather than the default executor's min(32, cpus + 4) threads. It lives
+    # and dies with this lifespan, so the app can be started again afterwards.
+    app.state.rag_executor = ThreadPoolExecutor(max_workers=settings.rag_threads or os.cpu_count() or 2)
+    
+    yield
+    
+    app.state.rag_executor.shutdown(wait=True)
+    # With several workers each would overwrite the others' saved cache
+    if settings.semantic_cache_path and settings.workers <= 1:
+        rag_system.semantic_cache.save(settings.semantic_cache_path)
+
+
 app = FastAPI(
     title="RAG Chatbot API",
     description="A Retrieval-Augmented Generation chatbot with document ingestion capabilities",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
+app.state.limiter = limiter
+app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+
+app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
+app.include_router(whatsapp_router)
 
 # CORS middleware for web frontend
 app.add_middleware(
@@ -27,9 +92,33 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize RAG system and conversation manager
-rag_system = RAGSystem()
-conversation_manager = ConversationManager()
+class StreamingAwareGZipMiddleware(GZipMiddleware):
+    """GZip middleware that passes streamed answers through uncompressed.
+    
+    Starlette compresses every multi-part body regardless of size and never
+    flushes zlib between parts, so a gzipped /chat/stream would only reach
+    the client once the answer is complete.
+    """
+    
+    UNCOMPRESSED_PATHS = frozenset({"/chat/stream"})
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in self.UNCOMPRESSED_PATHS:
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+# Compress larger responses (chat sources, stats); level 5 is nearly as small as 9 for JSON
+app.add_middleware(StreamingAwareGZipMiddleware, minimum_size=1024, compresslevel=5)
+
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    """Reject oversize uploads from their Content-Length header, before the body is read."""
+    if request.url.path == "/upload-document":
+        content_length = request.headers.get("content-length", "")
+        if content_length.isdigit() and int(content_length) > settings.max_upload_bytes:
+            return ORJSONResponse(status_code=413, content={"detail": "Upload too large"})
+    return await call_next(request)
 
 # Pydantic models for API requests
 class ChatRequest(BaseModel):
@@ -44,6 +133,17 @@ class ChatResponse(BaseModel):
     confidence: float
     metadata: Dict[str, Any]
 
+class ChatBatchRequest(BaseModel):
+    requests: List[ChatRequest] = Field(..., max_length=settings.max_chat_batch)
+
+class ChatBatchItem(BaseModel):
+    status: str
+    response: Optional[ChatResponse] = None
+    error: Optional[str] = None
+
+class ChatBatchResponse(BaseModel):
+    results: List[ChatBatchItem]
+
 class URLRequest(BaseModel):
     url: str
 
@@ -55,240 +155,156 @@ class DocumentResponse(BaseModel):
 @app.get("/", response_class=HTMLResponse)
 async def root():
     """Serve the main chat interface."""
-    return HTMLResponse(content="""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>RAG Chatbot</title>
-        <style>
-            body { font-family: Arial, sans-serif; margin: 0; padding: 20px; background-color: #f5f5f5; }
-            .container { max-width: 800px; margin: 0 auto; background: white; border-radius: 10px; padding: 20px; box-shadow: 0 0 10px rgba(0,0,0,0.1); }
-            .header { text-align: center; margin-bottom: 30px; }
-            .chat-container { border: 1px solid #ddd; height: 400px; overflow-y: auto; padding: 15px; border-radius: 5px; background-color: #f9f9f9; }
-            .message { margin-bottom: 15px; padding: 10px; border-radius: 5px; }
-            .user-message { background-color: #007bff; color: white; text-align: right; }
-            .bot-message { background-color: #e9ecef; color: #333; }
-            .input-container { margin-top: 20px; display: flex; gap: 10px; }
-            .input-container input { flex-grow: 1; padding: 10px; border: 1px solid #ddd; border-radius: 5px; }
-            .input-container button { padding: 10px 20px; background-color: #007bff; color: white; border: none; border-radius: 5px; cursor: pointer; }
-            .upload-section { margin-top: 20px; padding: 20px; border: 1px solid #ddd; border-radius: 5px; background-color: #f8f9fa; }
-            .sources { margin-top: 10px; font-size: 12px; color: #666; }
-            .confidence { font-size: 12px; color: #28a745; margin-top: 5px; }
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <h1>🤖 RAG Chatbot</h1>
-                <p>Ask questions about uploaded documents</p>
-            </div>
-            
-            <div class="upload-section">
-                <h3>📁 Upload Documents</h3>
-                <input type="file" id="file-input" multiple accept=".pdf,.docx,.txt,.md,.html">
-                <button onclick="uploadFiles()">Upload</button>
-                <div style="margin-top: 10px;">
-                    <input type="url" id="url-input" placeholder="Or enter a URL...">
-                    <button onclick="uploadURL()">Add URL</button>
-                </div>
-                <div id="upload-status"></div>
-            </div>
-            
-            <div class="chat-container" id="chat-container">
-                <div class="message bot-message">
-                    Hello! I'm your RAG chatbot. Upload some documents and ask me questions about them.
-                </div>
-            </div>
-            
-            <div class="input-container">
-                <input type="text" id="message-input" placeholder="Type your message..." onkeypress="handleKeyPress(event)">
-                <button onclick="sendMessage()">Send</button>
-            </div>
-        </div>
-
-        <script>
-            let conversationId = null;
-
-            function handleKeyPress(event) {
-                if (event.key === 'Enter') {
-                    sendMessage();
-                }
-            }
-
-            function addMessage(content, isUser, sources = [], confidence = null) {
-                const chatContainer = document.getElementById('chat-container');
-                const messageDiv = document.createElement('div');
-                messageDiv.className = 'message ' + (isUser ? 'user-message' : 'bot-message');
-                
-                let messageContent = content;
-                
-                if (sources && sources.length > 0 && !isUser) {
-                    const sourcesList = sources.map(s => `📄 ${s.filename}`).join(', ');
-                    messageContent += `<div class="sources">Sources: ${sourcesList}</div>`;
-                }
-                
-                if (confidence !== null && !isUser) {
-                    messageContent += `<div class="confidence">Confidence: ${(confidence * 100).toFixed(1)}%</div>`;
-                }
-                
-                messageDiv.innerHTML = messageContent;
-                chatContainer.appendChild(messageDiv);
-                chatContainer.scrollTop = chatContainer.scrollHeight;
-            }
-
-            async function sendMessage() {
-                const input = document.getElementById('message-input');
-                const message = input.value.trim();
-                if (!message) return;
-
-                addMessage(message, true);
-                input.value = '';
-
-                try {
-                    const response = await fetch('/chat', {
-                        method: 'POST',
-                        headers: { 'Content-Type': 'application/json' },
-                        body: JSON.stringify({ 
-                            message: message, 
-                            conversation_id: conversationId 
-                        })
-                    });
-
-                    const data = await response.json();
-                    conversationId = data.conversation_id;
-                    addMessage(data.response, false, data.sources, data.confidence);
-                } catch (error) {
-                    addMessage('Sorry, there was an error processing your request.', false);
-                }
-            }
-
-            async function uploadFiles() {
-                const fileInput = document.getElementById('file-input');
-                const files = fileInput.files;
-                const statusDiv = document.getElementById('upload-status');
-                
-                if (files.length === 0) {
-                    statusDiv.innerHTML = '<div style="color: red;">Please select files to upload.</div>';
-                    return;
-                }
-
-                statusDiv.innerHTML = '<div style="color: blue;">Uploading...</div>';
-
-                for (let file of files) {
-                    const formData = new FormData();
-                    formData.append('file', file);
-
-                    try {
-                        const response = await fetch('/upload-document', {
-                            method: 'POST',
-                            body: formData
-                        });
-
-                        const data = await response.json();
-                        if (data.status === 'success') {
-                            statusDiv.innerHTML += `<div style="color: green;">✅ ${file.name} uploaded successfully</div>`;
-                        } else {
-                            statusDiv.innerHTML += `<div style="color: red;">❌ Failed to upload ${file.name}: ${data.message}</div>`;
-                        }
-                    } catch (error) {
-                        statusDiv.innerHTML += `<div style="color: red;">❌ Error uploading ${file.name}</div>`;
-                    }
-                }
-
-                fileInput.value = '';
-            }
-
-            async function uploadURL() {
-                const urlInput = document.getElementById('url-input');
-                const url = urlInput.value.trim();
-                const statusDiv = document.getElementById('upload-status');
-                
-                if (!url) {
-                    statusDiv.innerHTML = '<div style="color: red;">Please enter a URL.</div>';
-                    return;
-                }
-
-                statusDiv.innerHTML = '<div style="color: blue;">Processing URL...</div>';
-
-                try {
-                    const response = await fetch('/upload-url', {
-                        method: 'POST',
-                        headers: { 'Content-Type': 'application/json' },
-                        body: JSON.stringify({ url: url })
-                    });
-
-                    const data = await response.json();
-                    if (data.status === 'success') {
-                        statusDiv.innerHTML = '<div style="color: green;">✅ URL content processed successfully</div>';
-                    } else {
-                        statusDiv.innerHTML = `<div style="color: red;">❌ Failed to process URL: ${data.message}</div>`;
-                    }
-                } catch (error) {
-                    statusDiv.innerHTML = '<div style="color: red;">❌ Error processing URL</div>';
-                }
-
-                urlInput.value = '';
-            }
-        </script>
-    </body>
-    </html>
-    """)
+    return FileResponse(STATIC_DIR / "index.html", media_type="text/html")
+
+async def _chat_core(request: ChatRequest) -> ChatResponse:
+    """Answer one chat request, recording it in the conversation history."""
+    # Generate conversation ID if not provided
+    if not request.conversation_id:
+        request.conversation_id = str(uuid.uuid4())
+    
+    # Greetings and punctuation-only messages have nothing to retrieve
+    if is_smalltalk(request.message):
+        return ChatResponse(
+            response=settings.smalltalk_reply,
+            conversation_id=request.conversation_id,
+            sources=[],
+            confidence=1.0,
+            metadata={"smalltalk": True}
+        )
+    
+    # Get conversation history
+    history = await conversations.get_conversation_history(
+        request.conversation_id,
+        limit=settings.rag_history_window
+    )
+    
+    # Add user message to history
+    await conversations.add_message(
+        request.conversation_id, 
+        "user", 
+        request.message
+    )
+    
+    # Query RAG system off the event loop; repeats are answered from the answer caches
+    rag_response = await _run_blocking(rag_system.cached_query, request.message, history)
+    
+    # Add assistant response to history
+    await conversations.add_message(
+        request.conversation_id,
+        "assistant", 
+        rag_response.answer,
+        {"sources": rag_response.source_ids}
+    )
+    
+    return ChatResponse(
+        response=rag_response.answer,
+        conversation_id=request.conversation_id,
+        sources=rag_response.sources,
+        confidence=rag_response.confidence,
+        metadata=rag_response.metadata
+    )
 
 @app.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     """Handle chat requests."""
     try:
-        # Generate conversation ID if not provided
-        if not request.conversation_id:
-            request.conversation_id = str(uuid.uuid4())
-        
-        # Get conversation history
-        history = conversation_manager.get_conversation_history(request.conversation_id)
-        
-        # Add user message to history
-        conversation_manager.add_message(
-            request.conversation_id, 
-            "user", 
-            request.message
-        )
-        
-        # Query RAG system
-        rag_response = rag_system.query(request.message, history)
+        return await _chat_core(request)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/chat/batch", response_model=ChatBatchResponse)
+@limiter.limit(settings.chat_batch_rate_limit)
+async def chat_batch(request: Request, batch: ChatBatchRequest):
+    """Answer several chat requests concurrently; one failing request does not fail the batch."""
+    # Concurrent requests share embedding and search batches via the micro-batchers
+    outcomes = await asyncio.gather(
+        *(_chat_core(chat_request) for chat_request in batch.requests),
+        return_exceptions=True
+    )
+    
+    results = []
+    for outcome in outcomes:
+        if isinstance(outcome, Exception):
+            results.append(ChatBatchItem(status="error", error=str(outcome)))
+        else:
+            results.append(ChatBatchItem(status="success", response=outcome))
+    return ChatBatchResponse(results=results)
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """Stream the answer to a chat request as plain text."""
+    # Generate conversation ID if not provided
+    if not request.conversation_id:
+        request.conversation_id = str(uuid.uuid4())
+    
+    # Get conversation history
+    history = await conversations.get_conversation_history(
+        request.conversation_id,
+        limit=settings.rag_history_window
+    )
+    
+    # Add user message to history
+    await conversations.add_message(
+        request.conversation_id,
+        "user",
+        request.message
+    )
+    
+    async def generate():
+        parts = []
+        try:
+            async for token in rag_system.stream_query(request.message, history, executor=app.state.rag_executor):
+                parts.append(token)
+                yield token
+        except Exception as e:
+            error = f"I encountered an error while processing your question: {str(e)}"
+            parts.append(error)
+            yield error
         
-        # Add assistant response to history
-        conversation_manager.add_message(
+        # Add assistant response to history once the stream is complete
+        await conversations.add_message(
             request.conversation_id,
-            "assistant", 
-            rag_response.answer,
-            {"sources": [s['id'] for s in rag_response.sources]}
-        )
-        
-        return ChatResponse(
-            response=rag_response.answer,
-            conversation_id=request.conversation_id,
-            sources=rag_response.sources,
-            confidence=rag_response.confidence,
-            metadata=rag_response.metadata
+            "assistant",
+            "".join(parts)
         )
     
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return StreamingResponse(
+        generate(),
+        media_type="text/plain",
+        headers={"X-Conversation-Id": request.conversation_id}
+    )
 
 @app.post("/upload-document", response_model=DocumentResponse)
 async def upload_document(file: UploadFile = File(...)):
     """Upload and process a document."""
+    # Reject unsupported types before writing anything to disk
+    suffix = Path(file.filename).suffix.lower()
+    if suffix not in DocumentProcessor.SUPPORTED_FILE_TYPES:
+        raise HTTPException(status_code=415, detail=f"Unsupported file type: {suffix}")
+    
     try:
-        # Save uploaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix=Path(file.filename).suffix) as tmp_file:
-            content = await file.read()
-            tmp_file.write(content)
+        # Save uploaded file temporarily, in chunks so large files are never held in memory
+        size = 0
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
             tmp_file_path = tmp_file.name
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                # Uploads without a Content-Length are measured as they are copied
+                size += len(chunk)
+                if size > settings.max_upload_bytes:
+                    break
+                tmp_file.write(chunk)
         
         try:
-            # Process document
-            result = rag_system.add_document(tmp_file_path)
+            if size > settings.max_upload_bytes:
+                raise HTTPException(status_code=413, detail="Upload too large")
+            
+            # Process document off the event loop
+            async with ingest_semaphore:
+                result = await _run_blocking(rag_system.add_document, tmp_file_path)
             
             if result["status"] == "success":
+                _cached_stats.cache_clear()
                 return DocumentResponse(
                     status="success",
                     message=f"Document '{file.filename}' processed successfully. Added {result['chunks_added']} chunks.",
@@ -304,6 +320,8 @@ async def upload_document(file: UploadFile = File(...)):
             # Clean up temporary file
             os.unlink(tmp_file_path)
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -311,9 +329,11 @@ async def upload_document(file: UploadFile = File(...)):
 async def upload_url(request: URLRequest):
     """Process content from a URL."""
     try:
-        result = rag_system.add_document_from_url(request.url)
+        async with ingest_semaphore:
+            result = await _run_blocking(rag_system.add_document_from_url, request.url)
         
         if result["status"] == "success":
+            _cached_stats.cache_clear()
             return DocumentResponse(
                 status="success",
                 message=f"URL content processed successfully. Added {result['chunks_added']} chunks.",
@@ -328,11 +348,17 @@ async def upload_url(request: URLRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@alru_cache(maxsize=1, ttl=settings.stats_cache_ttl)
+async def _cached_stats() -> Dict[str, Any]:
+    """Knowledge base statistics, recomputed at most once per TTL (cleared after uploads)."""
+    return await _run_blocking(rag_system.get_knowledge_base_stats)
+
 @app.get("/stats")
-async def get_stats():
+@limiter.limit(settings.introspection_rate_limit)
+async def get_stats(request: Request):
     """Get knowledge base statistics."""
     try:
-        stats = rag_system.get_knowledge_base_stats()
+        stats = await _cached_stats()
         return {
             "status": "success",
             "stats": stats
@@ -341,13 +367,13 @@ async def get_stats():
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/conversations")
-async def get_conversations():
+@limiter.limit(settings.introspection_rate_limit)
+async def get_conversations(request: Request):
     """Get all conversation IDs."""
     try:
-        conversations = conversation_manager.get_all_conversations()
         return {
             "status": "success",
-            "conversations": conversations
+            "conversations": await conversations.get_all_conversations()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -356,7 +382,7 @@ async def get_conversations():
 async def clear_conversation(conversation_id: str):
     """Clear a specific conversation."""
     try:
-        conversation_manager.clear_conversation(conversation_id)
+        await conversations.clear_conversation(conversation_id)
         return {
             "status": "success",
             "message": f"Conversation {conversation_id} cleared"
@@ -371,4 +397,15 @@ async def health_check():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host=settings.host, port=settings.port)
+    import importlib.util
+    
+    # Multiple workers need the app as an import string; each builds its own RAG system,
+    # so server_workers() refuses more than one unless the stores are shared
+    uvicorn.run(
+        "src.web_app:app",
+        host=settings.host,
+        port=settings.port,
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        http="httptools" if importlib.util.find_spec("httptools") else "auto",
+        workers=settings.server_workers()
+    )
@@ -1,12 +1,55 @@
+import re
+import asyncio
+from fastapi import APIRouter, Form, Request, Response
 from twilio.rest import Client
 from twilio.twiml.messaging_response import MessagingResponse
-from flask import Flask, request
 from typing import Dict, Any
-import threading
 
-from .rag_system import RAGSystem, ConversationManager
+from .rag_system import RAGSystem, ConversationManager, is_smalltalk
 from config.settings import settings
 
+# Last whitespace or sentence end in a byte string, where a message can be cut cleanly
+_BOUNDARY = re.compile(rb"[\s.!?]\S*$")
+_TRUNCATION_NOTICE = "...\n\n_Message truncated due to length._"
+
+
+# Mounted on the FastAPI app; the bot and the executor for blocking calls live in app.state
+router = APIRouter(prefix="/whatsapp")
+
+
+@router.post("/webhook")
+async def whatsapp_webhook(request: Request, From: str = Form(...), To: str = Form(None), Body: str = Form("")):
+    """Handle incoming WhatsApp messages."""
+    body = Body.strip()
+    if not body:
+        return Response(status_code=200)
+    
+    # Generate conversation ID from phone number
+    conversation_id = f"whatsapp_{From.replace('whatsapp:', '').replace('+', '')}"
+    
+    # Process the query off the event loop, on the app's RAG executor
+    bot: "WhatsAppBot" = request.app.state.whatsapp_bot
+    response_text = await asyncio.get_running_loop().run_in_executor(
+        request.app.state.rag_executor,
+        bot.handle_query,
+        body,
+        From,
+        conversation_id
+    )
+    
+    # Create TwiML response
+    response = MessagingResponse()
+    response.message(response_text)
+    
+    return Response(content=str(response), media_type="text/xml")
+
+
+@router.post("/status")
+async def whatsapp_status():
+    """Handle WhatsApp message status updates."""
+    # You can log message delivery status here if needed
+    return Response(status_code=200)
+
 
 class WhatsAppBot:
     """WhatsApp integration using Twilio for the RAG chatbot."""
@@ -20,41 +63,6 @@ class WhatsAppBot:
             self.client = Client(settings.twilio_account_sid, settings.twilio_auth_token)
         else:
             self.client = None
-        
-        self.app = Flask(__name__)
-        self.setup_routes()
-    
-    def setup_routes(self):
-        """Setup Flask routes for WhatsApp webhooks."""
-        
-        @self.app.route('/whatsapp/webhook', methods=['POST'])
-        def whatsapp_webhook():
-            """Handle incoming WhatsApp messages."""
-            # Get message details
-            from_number = request.form.get('From')
-            to_number = request.form.get('To')
-            body = request.form.get('Body', '').strip()
-            
-            if not body:
-                return '', 200
-            
-            # Generate conversation ID from phone number
-            conversation_id = f"whatsapp_{from_number.replace('whatsapp:', '').replace('+', '')}"
-            
-            # Process the query
-            response_text = self.handle_query(body, from_number, conversation_id)
-            
-            # Create TwiML response
-            response = MessagingResponse()
-            response.message(response_text)
-            
-            return str(response), 200, {'Content-Type': 'text/xml'}
-        
-        @self.app.route('/whatsapp/status', methods=['POST'])
-        def whatsapp_status():
-            """Handle WhatsApp message status updates."""
-            # You can log message delivery status here if needed
-            return '', 200
     
     def handle_query(self, text: str, from_number: str, conversation_id: str) -> str:
         """Process a query and return response."""
@@ -63,21 +71,28 @@ class WhatsAppBot:
             if not self.client:
                 return "WhatsApp integration is not properly configured."
             
+            # Greetings and punctuation-only messages have nothing to retrieve
+            if is_smalltalk(text):
+                return settings.smalltalk_reply
+            
             # Get conversation history
-            history = self.conversation_manager.get_conversation_history(conversation_id)
+            history = self.conversation_manager.get_conversation_history(
+                conversation_id,
+                limit=settings.rag_history_window
+            )
             
             # Add user message to history
             self.conversation_manager.add_message(conversation_id, "user", text)
             
-            # Query RAG system
-            rag_response = self.rag_system.query(text, history)
+            # Query RAG system; repeats are answered from the answer caches shared with the web app
+            rag_response = self.rag_system.cached_query(text, history)
             
             # Add assistant response to history
             self.conversation_manager.add_message(
                 conversation_id,
                 "assistant",
                 rag_response.answer,
-                {"sources": [s['id'] for s in rag_response.sources]}
+                {"sources": rag_response.source_ids}
             )
             
             # Format response for WhatsApp (keeping it concise)
@@ -94,10 +109,7 @@ class WhatsAppBot:
                 response += f"\n\n🎯 *Confidence:* {rag_response.confidence:.1%}"
             
             # Truncate if too long (WhatsApp has message limits)
-            if len(response) > 1500:
-                response = response[:1450] + "...\n\n_Message truncated due to length._"
-            
-            return response
+            return format_whatsapp_message(response)
             
         except Exception as e:
             return f"Sorry, I encountered an error: {str(e)}"
@@ -124,41 +136,23 @@ class WhatsAppBot:
         except Exception as e:
             print(f"Error sending WhatsApp message: {str(e)}")
             return False
-    
-    def run(self, port: int = 3001):
-        """Run the WhatsApp bot Flask app."""
-        self.app.run(host='0.0.0.0', port=port, debug=False)
-
-
-def start_whatsapp_bot(rag_system: RAGSystem, conversation_manager: ConversationManager):
-    """Start the WhatsApp bot in a separate thread."""
-    if not settings.twilio_account_sid or not settings.twilio_auth_token:
-        print("Twilio credentials not configured. Skipping WhatsApp integration.")
-        return None
-    
-    bot = WhatsAppBot(rag_system, conversation_manager)
-    
-    # Run in a separate thread
-    bot_thread = threading.Thread(target=bot.run, args=(3001,))
-    bot_thread.daemon = True
-    bot_thread.start()
-    
-    print("WhatsApp bot started on port 3001")
-    return bot
 
 
 # Utility functions for WhatsApp formatting
 def format_whatsapp_message(text: str, max_length: int = 1500) -> str:
-    """Format and truncate messages for WhatsApp."""
-    if len(text) <= max_length:
+    """Format and truncate messages for WhatsApp, measuring ``max_length`` in UTF-8 bytes."""
+    data = text.encode('utf-8')
+    if len(data) <= max_length:
         return text
     
     # Find a good place to cut the message
-    truncate_point = text.rfind(' ', 0, max_length - 50)
-    if truncate_point == -1:
-        truncate_point = max_length - 50
+    head = data[:max_length - 50]
+    boundary = _BOUNDARY.search(head)
+    if boundary:
+        head = head[:boundary.start()]
     
-    return text[:truncate_point] + "...\n\n_Message truncated due to length._"
+    # A cut inside a multi-byte character leaves a partial sequence; drop it
+    return head.decode('utf-8', errors='ignore') + _TRUNCATION_NOTICE
 
 
 def add_whatsapp_formatting(text: str) -> str:
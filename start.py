@@ -6,9 +6,15 @@ This script helps you get started quickly with minimal configuration.
 
 import os
 import sys
+import argparse
+import importlib.util
 from pathlib import Path
 
 def main():
+    parser = argparse.ArgumentParser(description="Quick start script for the RAG Chatbot")
+    parser.add_argument("--skip-tests", action="store_true", help="skip the basic functionality tests")
+    args = parser.parse_args()
+    
     print("""
     🤖 RAG CHATBOT - QUICK START
     ===========================
@@ -39,51 +45,58 @@ def main():
     else:
         print("✅ Environment configuration found!")
     
-    # Check if requirements are installed
+    # Check if requirements are installed (find_spec only locates them, nothing is imported yet)
     print("\n📦 Checking dependencies...")
-    try:
-        import fastapi
-        import uvicorn
-        import sentence_transformers
-        import faiss
-        print("✅ Key dependencies are installed!")
-    except ImportError as e:
-        print(f"❌ Missing dependency: {e}")
+    missing = [name for name in ("fastapi", "uvicorn", "sentence_transformers", "faiss")
+               if importlib.util.find_spec(name) is None]
+    if missing:
+        print(f"❌ Missing dependency: {', '.join(missing)}")
         print("💡 Please install requirements: pip install -r requirements.txt")
         sys.exit(1)
+    print("✅ Key dependencies are installed!")
+    
+    # Add project root to path
+    project_root = Path(__file__).parent
+    sys.path.insert(0, str(project_root))
     
     # Test basic functionality
-    print("\n🧪 Running basic tests...")
-    try:
-        # Add project root to path
-        project_root = Path(__file__).parent
-        sys.path.insert(0, str(project_root))
-        
-        # Test imports
-        from src.rag_system import RAGSystem
-        from src.vector_store import create_vector_store
-        
-        # Test vector store creation
-        vector_store = create_vector_store("faiss", dimension=384)
-        
-        print("✅ Basic functionality test passed!")
-        
-    except Exception as e:
-        print(f"❌ Basic functionality test failed: {e}")
-        print("💡 Please check your installation and try again.")
-        sys.exit(1)
+    vector_store = None
+    if args.skip_tests:
+        print("\n⏭️  Skipping basic tests")
+    else:
+        print("\n🧪 Running basic tests...")
+        try:
+            # Test imports
+            from src.rag_system import RAGSystem
+            from src.vector_store import create_vector_store
+            
+            # Test vector store creation
+            vector_store = create_vector_store("faiss", dimension=384)
+            
+            print("✅ Basic functionality test passed!")
+            
+        except Exception as e:
+            print(f"❌ Basic functionality test failed: {e}")
+            print("💡 Please check your installation and try again.")
+            sys.exit(1)
     
     # Upload sample document
     print("\n📄 Setting up sample knowledge base...")
     try:
-        from src.document_processor import DocumentProcessor
-        
-        processor = DocumentProcessor()
         sample_doc = Path("docs/sample_faq.md")
+        if vector_store is None:
+            from src.vector_store import create_vector_store
+            vector_store = create_vector_store("faiss", dimension=384)
         
-        if sample_doc.exists():
+        if sample_doc.exists() and vector_store.has_document(sample_doc.name):
+            print("✅ Sample FAQ already indexed")
+        elif sample_doc.exists():
+            # Only load the embedding model when there is something to embed
+            from src.document_processor import DocumentProcessor
+            
+            processor = DocumentProcessor()
             result = processor.process_document(str(sample_doc))
-            doc_ids = vector_store.add_documents([result])
+            doc_ids = vector_store.add_documents_bulk([result])
             print(f"✅ Sample FAQ loaded ({len(doc_ids)} chunks)")
         else:
             print("⚠️  Sample FAQ not found, continuing without sample data")
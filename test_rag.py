@@ -5,31 +5,58 @@ Simple test script for the RAG chatbot system
 
 import os
 import sys
+import shutil
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from importlib.util import find_spec
+from itertools import islice
 from pathlib import Path
 
 # Add project root to path
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
-def test_basic_functionality():
+# The test vector store persists here so repeated runs skip re-embedding the sample FAQ
+TEST_CACHE_DIR = project_root / '.test_cache'
+TEST_INDEX_FILE = TEST_CACHE_DIR / 'faiss-int8.index'
+
+# Packages imported at module level by src/ and config/, as (distribution name, import name) pairs
+_REQUIRED = (
+    ('fastapi', 'fastapi'), ('uvicorn', 'uvicorn'), ('python-multipart', 'multipart'),
+    ('pydantic-settings', 'pydantic_settings'), ('async-lru', 'async_lru'), ('slowapi', 'slowapi'),
+    ('openai', 'openai'), ('sentence-transformers', 'sentence_transformers'), ('faiss-cpu', 'faiss'),
+    ('chromadb', 'chromadb'), ('pyarrow', 'pyarrow'), ('pypdfium2', 'pypdfium2'),
+    ('beautifulsoup4', 'bs4'), ('lxml', 'lxml'), ('httpx', 'httpx'), ('h2', 'h2'),
+    ('flask', 'flask'), ('slack-sdk', 'slack_sdk'), ('twilio', 'twilio'),
+    ('orjson', 'orjson'), ('numpy', 'numpy'), ('tiktoken', 'tiktoken'),
+)
+
+def _mtime(path: Path):
+    """Return a file's mtime, or None if it does not exist (one stat call)."""
+    try:
+        return path.stat().st_mtime
+    except FileNotFoundError:
+        return None
+
+def test_basic_functionality(force_rebuild: bool = False):
     """Test basic RAG functionality with sample document."""
     print("🧪 Testing RAG Chatbot Basic Functionality")
     print("=" * 50)
     
     try:
-        # Test imports
-        print("1. Testing imports...")
-        from src.rag_system import RAGSystem, ConversationManager
-        from src.vector_store import create_vector_store
-        print("✅ Imports successful")
-        
         # Test environment
-        print("2. Checking environment...")
-        from config.settings import settings
+        print("1. Checking environment...")
         
-        # Create a minimal .env for testing if it doesn't exist
+        # Runs before any src/config import, which builds the frozen Settings singleton.
+        # Create a minimal .env for testing if it doesn't exist; CI checkouts may be read-only,
+        # so there the test configuration goes into the process environment instead
         env_path = project_root / '.env'
-        if not env_path.exists():
+        if os.environ.get('CI'):
+            os.environ.setdefault('OPENAI_API_KEY', 'test_key_for_testing')
+            os.environ.setdefault('VECTOR_DB_TYPE', 'faiss')
+            print("✅ CI detected, using test configuration from the environment")
+        elif not env_path.exists():
             print("⚠️  No .env file found. Creating minimal test configuration...")
             with open(env_path, 'w') as f:
                 f.write("OPENAI_API_KEY=test_key_for_testing\n")
@@ -38,11 +65,27 @@ def test_basic_functionality():
         else:
             print("✅ Environment configuration found")
         
-        # Test vector store creation
+        # Test imports
+        print("2. Testing imports...")
+        from src.rag_system import RAGSystem, ConversationManager
+        from src.vector_store import create_vector_store, FAISSVectorStore
+        print("✅ Imports successful")
+        
+        # Test vector store creation, reusing the cached store unless the sample changed
         print("3. Testing vector store...")
+        sample_doc_path = project_root / 'docs' / 'sample_faq.md'
+        # Stat each file once and reuse the result for existence and freshness checks
+        sample_mtime = _mtime(sample_doc_path)
+        index_mtime = _mtime(TEST_INDEX_FILE)
+        cache_stale = index_mtime is None or (sample_mtime is not None and sample_mtime > index_mtime)
+        if force_rebuild or cache_stale:
+            shutil.rmtree(TEST_CACHE_DIR, ignore_errors=True)
+        TEST_CACHE_DIR.mkdir(exist_ok=True)
+        
         try:
-            vector_store = create_vector_store("faiss", dimension=384)
-            print("✅ FAISS vector store created successfully")
+            vector_store = create_vector_store("faiss", dimension=384, index_file=str(TEST_INDEX_FILE),
+                                               quantization="int8")
+            print("✅ FAISS vector store created successfully (int8 once calibrated)")
         except Exception as e:
             print(f"❌ Vector store creation failed: {e}")
             return False
@@ -51,18 +94,42 @@ def test_basic_functionality():
         print("4. Testing document processor...")
         from src.document_processor import DocumentProcessor
         
-        processor = DocumentProcessor()
-        
-        # Test with sample FAQ document
-        sample_doc_path = project_root / 'docs' / 'sample_faq.md'
-        if sample_doc_path.exists():
+        # Test with sample FAQ document (the embedding model is only loaded when needed)
+        if sample_mtime is not None and vector_store.has_document(sample_doc_path.name):
+            print(f"✅ Cached vector store reused ({vector_store.get_document_count()} chunks, use --force-rebuild to re-embed)")
+        elif sample_mtime is not None:
             try:
-                result = processor.process_document(str(sample_doc_path))
+                processor = DocumentProcessor()
+                
+                # The embedding model is loaded once per process and shared by later processors
+                assert DocumentProcessor().embedding_model is processor.embedding_model, "embedding model was reloaded"
+                
+                # Read, embed and upsert run as overlapping pipeline stages
+                [result] = asyncio.run(processor.ingest_documents_async([sample_doc_path], vector_store))
                 print(f"✅ Document processed: {result['metadata']['total_chunks']} chunks created")
                 
+                # All chunks are embedded in one batched encode call into a single float32 matrix
+                embeddings = result['chunks']['embeddings']
+                expected_shape = (result['metadata']['total_chunks'], vector_store.dimension)
+                assert embeddings.shape == expected_shape and embeddings.dtype == 'float32', \
+                    f"unexpected embeddings {embeddings.shape} {embeddings.dtype}, expected {expected_shape} float32"
+                
                 # Test adding to vector store
-                doc_ids = vector_store.add_documents([result])
-                print(f"✅ {len(doc_ids)} chunks added to vector store")
+                assert vector_store.has_document(sample_doc_path.name), "ingested document missing from vector store"
+                print(f"✅ {result['metadata']['total_chunks']} chunks added to vector store")
+                
+                # The streaming splitter feeds the encoder batch by batch without reading the whole file
+                chunk_iter = processor.iter_chunks(str(sample_doc_path))
+                streamed = 0
+                while batch := list(islice(chunk_iter, 64)):
+                    assert processor.generate_embeddings(batch).shape == (len(batch), vector_store.dimension)
+                    streamed += len(batch)
+                print(f"✅ Streaming splitter produced {streamed} chunks")
+                
+                # Extraction for many files fans out to worker processes; embedding stays batched here
+                copies = processor.process_documents([str(sample_doc_path)] * 4, num_workers=4)
+                assert [doc['metadata']['total_chunks'] for doc in copies] == [result['metadata']['total_chunks']] * 4
+                print(f"✅ Multiprocess ingestion processed {len(copies)} documents")
                 
             except Exception as e:
                 print(f"❌ Document processing failed: {e}")
@@ -70,11 +137,115 @@ def test_basic_functionality():
         else:
             print("⚠️  Sample document not found, skipping document processing test")
         
+        # Test search and the vector store's query cache
+        print("5. Testing search and query cache...")
+        import numpy as np
+        import faiss
+        # RAGSystem retrieves through search_batch, so repeats must hit the cache on that path
+        query_embeddings = np.random.default_rng(0).random((2, vector_store.dimension), dtype=np.float32)
+        first = vector_store.search_batch(query_embeddings, top_k=3)
+        for hits in first:
+            hits.clear()
+        repeated = vector_store.search_batch(query_embeddings, top_k=3)
+        cache_stats = vector_store.query_cache.stats()
+        if cache_stats['hits'] >= 2 and (vector_store.get_document_count() == 0 or all(repeated)):
+            print(f"✅ Repeated batched search served from the query cache (hit rate {cache_stats['hit_rate']:.0%})")
+        else:
+            print("❌ Query cache test failed")
+            return False
+        
+        # Several queries go to FAISS as one (nq, d) matrix and come back in submission order
+        query_matrix = np.random.default_rng(1).random((8, vector_store.dimension), dtype=np.float32)
+        batch_results = vector_store.search_batch(query_matrix, top_k=3)
+        single_results = [vector_store.search(row.tolist(), top_k=3) for row in query_matrix]
+        if [[r['id'] for r in hits] for hits in batch_results] == [[r['id'] for r in hits] for hits in single_results]:
+            print(f"✅ Batched search matches per-query search ({len(batch_results)} queries)")
+        else:
+            print("❌ Batched search test failed")
+            return False
+        
+        # Reopening the persisted store read-only must give the same results
+        # (this int8 flat index is read into memory; FAISS only memory-maps IVF indexes)
+        vector_store.flush()
+        mapped_store = FAISSVectorStore.load_mmap(str(TEST_INDEX_FILE), dimension=384, quantization="int8")
+        mapped_results = mapped_store.search_batch(query_matrix, top_k=3)
+        if [[r['id'] for r in hits] for hits in mapped_results] == [[r['id'] for r in hits] for hits in batch_results]:
+            print("✅ Read-only index matches the in-memory index")
+        else:
+            print("❌ Read-only index test failed")
+            return False
+        
+        # Larger corpora switch to an HNSW graph; build one over synthetic unit vectors
+        rng = np.random.default_rng(2)
+        graph_vectors = rng.standard_normal((256, vector_store.dimension)).astype(np.float32)
+        graph_vectors /= np.linalg.norm(graph_vectors, axis=1, keepdims=True)
+        hnsw_index_file = TEST_CACHE_DIR / 'hnsw.index'
+        hnsw_index_file.unlink(missing_ok=True)
+        shutil.rmtree(f"{hnsw_index_file}.meta", ignore_errors=True)
+        hnsw_store = create_vector_store("faiss", dimension=384, index_type="hnsw", flat_threshold=0,
+                                         hnsw_m=16, ef_construction=40, ef_search=32,
+                                         index_file=str(hnsw_index_file), flush_interval=None)
+        hnsw_store.add_documents([{
+            'filename': 'synthetic',
+            'file_type': '.txt',
+            'chunks': {
+                'ids': np.arange(len(graph_vectors)),
+                'texts': [f"vector {i}" for i in range(len(graph_vectors))],
+                'token_counts': np.ones(len(graph_vectors), dtype=np.int64),
+                'embeddings': graph_vectors
+            }
+        }])
+        nearest = hnsw_store.search_batch(graph_vectors[:8], top_k=1)
+        if isinstance(hnsw_store.index, faiss.IndexHNSW) and [hits[0]['text'] for hits in nearest] == [f"vector {i}" for i in range(8)]:
+            print("✅ HNSW index (M=16) finds stored vectors")
+        else:
+            print("❌ HNSW index test failed")
+            return False
+        
+        # A flush interrupted between the metadata segment and the index leaves extra rows; loading drops them
+        hnsw_store.flush()
+        orphan_segment = Path(f"{hnsw_index_file}.meta") / f"segment-{hnsw_store.segment_count:06d}.arrow"
+        hnsw_store._write_segment(str(orphan_segment), hnsw_store.table.slice(0, 4))
+        reloaded = create_vector_store("faiss", dimension=384, index_file=str(hnsw_index_file), flush_interval=None)
+        if reloaded.table.num_rows == reloaded.index.ntotal and not orphan_segment.exists():
+            print("✅ Metadata rows without indexed vectors are dropped on load")
+        else:
+            print("❌ Interrupted flush recovery test failed")
+            return False
+        
+        # int8 ranges are only trained once enough vectors are stored, then every vector is re-encoded
+        int8_index_file = TEST_CACHE_DIR / 'int8.index'
+        int8_index_file.unlink(missing_ok=True)
+        shutil.rmtree(f"{int8_index_file}.meta", ignore_errors=True)
+        int8_store = create_vector_store("faiss", dimension=384, quantization="int8", quantize_threshold=128,
+                                         index_file=str(int8_index_file), flush_interval=None)
+        for start in (0, 64, 128):
+            int8_store.add_documents([{
+                'filename': f'synthetic-{start}',
+                'file_type': '.txt',
+                'chunks': {
+                    'ids': np.arange(start, start + 64),
+                    'texts': [f"vector {i}" for i in range(start, start + 64)],
+                    'token_counts': np.ones(64, dtype=np.int64),
+                    'embeddings': graph_vectors[start:start + 64]
+                }
+            }])
+            if start == 0 and int8_store.index.sa_code_size() != 4 * int8_store.dimension:
+                print("❌ int8 index was trained before calibration")
+                return False
+        # int8 scalar codes take one byte per dimension instead of four
+        nearest = int8_store.search_batch(graph_vectors[::24], top_k=1)
+        if int8_store.index.sa_code_size() == int8_store.dimension and \
+                [hits[0]['text'] for hits in nearest] == [f"vector {i}" for i in range(0, 192, 24)]:
+            print(f"✅ int8 index calibrated on {int8_store.index.ntotal} vectors finds stored vectors")
+        else:
+            print("❌ int8 quantization test failed")
+            return False
+        
         # Test conversation manager
-        print("5. Testing conversation manager...")
+        print("6. Testing conversation manager...")
         conv_manager = ConversationManager()
-        conv_manager.add_message("test_conv", "user", "Hello")
-        conv_manager.add_message("test_conv", "assistant", "Hi there!")
+        conv_manager.add_messages("test_conv", [("user", "Hello"), ("assistant", "Hi there!")])
         
         history = conv_manager.get_conversation_history("test_conv")
         if len(history) == 2:
@@ -110,15 +281,14 @@ def test_web_app_imports():
         from src.web_app import app
         print("✅ FastAPI app imports successfully")
         
-        # Test if we can get the routes
-        routes = [route.path for route in app.routes]
-        expected_routes = ["/", "/chat", "/upload-document", "/health"]
+        # Test if we can get the routes; set intersection/difference splits them in one pass each
+        routes = {route.path for route in app.routes}
+        expected_routes = {"/", "/chat", "/upload-document", "/health"}
         
-        for route in expected_routes:
-            if route in routes:
-                print(f"✅ Route {route} found")
-            else:
-                print(f"⚠️  Route {route} not found")
+        # Collect the report and write it in one call
+        lines = [f"✅ Route {route} found" for route in sorted(expected_routes & routes)]
+        lines += [f"⚠️  Route {route} not found" for route in sorted(expected_routes - routes)]
+        print("\n".join(lines))
         
         return True
     except Exception as e:
@@ -131,21 +301,22 @@ def check_requirements():
     print("\n📦 Checking Required Packages")
     print("=" * 35)
     
-    required_packages = [
-        'fastapi', 'uvicorn', 'openai', 'sentence-transformers',
-        'faiss-cpu', 'chromadb', 'PyPDF2', 'python-docx',
-        'beautifulsoup4', 'requests', 'pandas', 'numpy'
-    ]
-    
     missing_packages = []
     
-    for package in required_packages:
-        try:
-            __import__(package.replace('-', '_'))
-            print(f"✅ {package}")
-        except ImportError:
-            print(f"❌ {package} (missing)")
+    # find_spec only locates the package; nothing is imported or initialized
+    # Probes are independent sys.path walks; run them concurrently, results stay in order
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        specs = list(executor.map(find_spec, [import_name for _, import_name in _REQUIRED]))
+    
+    # Collect the per-package report and write it in one call
+    lines = []
+    for (package, _), spec in zip(_REQUIRED, specs):
+        if spec is not None:
+            lines.append(f"✅ {package}")
+        else:
+            lines.append(f"❌ {package} (missing)")
             missing_packages.append(package)
+    print("\n".join(lines))
     
     if missing_packages:
         print(f"\n⚠️  Missing packages: {', '.join(missing_packages)}")
@@ -157,18 +328,27 @@ def check_requirements():
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RAG Chatbot test suite")
+    parser.add_argument("--force-rebuild", action="store_true", help="re-embed the sample FAQ instead of reusing .test_cache")
+    parser.add_argument("--requirements-only", action="store_true",
+                        help="only check installed packages, without importing the app")
+    parser.add_argument("--skip-web", action="store_true", help="skip importing the FastAPI app")
+    args = parser.parse_args()
+    
     print("🚀 RAG Chatbot Test Suite")
     print("=" * 60)
     
     # Check requirements first
     requirements_ok = check_requirements()
     
-    if requirements_ok:
+    if requirements_ok and args.requirements_only:
+        print("\n✅ Requirements check passed (--requirements-only)")
+    elif requirements_ok:
         # Run basic functionality tests
-        basic_tests_ok = test_basic_functionality()
+        basic_tests_ok = test_basic_functionality(force_rebuild=args.force_rebuild)
         
-        # Test web app
-        web_app_ok = test_web_app_imports()
+        # Test web app; importing it pulls in FastAPI and the messaging integrations
+        web_app_ok = args.skip_web or test_web_app_imports()
         
         if basic_tests_ok and web_app_ok:
             print("\n🎉 All tests passed! Your RAG chatbot is ready to go!")